@@ -1,3 +1,25 @@
 from . import schemas, utils
 from .amo_crm import AmoCRMApi
-from .auth import AmoCRMAuth, AmoCRMTokenAuth, storage
+from .async_amo_crm import AsyncAmoCRMApi
+from .auth import (
+    AmoCRMAuth,
+    AmoCRMTokenAuth,
+    AsyncAmoCRMAuth,
+    AsyncAmoCRMTokenAuth,
+    storage,
+)
+from .buffer import AsyncUpdateBuffer, UpdateBuffer
+from .cache import ResponseCache
+from .catalog import AccountCatalog, AsyncAccountCatalog
+from .rate_limit import TokenBucket, get_rate_limiter
+from .retry import RetryBudget, RetryPolicy
+from .revalidation import Revalidator
+from .store import EntityStore
+from .sync import (
+    AsyncIncrementalSync,
+    BaseCursorStorage,
+    FileCursorStorage,
+    IncrementalSync,
+    MemoryCursorStorage,
+    SyncCursor,
+)
@@ -1,16 +1,35 @@
-from functools import cached_property
-from typing import Any, Dict, Generic, Iterable, List, Optional, Type, TypeVar, get_args
-
-from pydantic import TypeAdapter
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
 
 from .auth import BaseAuth
+from .base_api import (
+    BATCH_SIZE,
+    COMPLEX_BATCH_SIZE,
+    STREAM_CHUNK_SIZE,
+    BaseAmoCRMApi,
+    ContactType,
+    EntityType,
+    ListMode,
+    LeadType,
+)
+from .cache import PIPELINES, USERS, ResponseCache
+from .exceptions import ValidationError
 from .filters import Filter
 from .schemas import (
+    BatchItemResultSchema,
     ComplexCreateResponseSchema,
-    ContactSchema,
+    ComplexLeadSchema,
     CustomFieldSchema,
-    LeadSchema,
-    ListModelSchema,
     PipelineSchema,
     StatusSchema,
     UpdateResponseSchema,
@@ -19,129 +38,256 @@ from .schemas import (
     LeadLossReasonSchema,
     TagSchema,
 )
+from .schemas.base_model import API_CONTEXT
+from .store import CONTACTS, LEADS, EntityStore
+from .streaming import iter_array_batches
 
-LeadType = TypeVar("LeadType", bound=LeadSchema)
-ContactType = TypeVar("ContactType", bound=ContactSchema)
 
+class AmoCRMApi(BaseAmoCRMApi[LeadType, ContactType]):
+    _auth: BaseAuth
 
-class AmoCRMApi(Generic[LeadType, ContactType]):
-    def __init__(self, auth: BaseAuth) -> None:
+    def __init__(
+        self,
+        auth: BaseAuth,
+        warm_up: bool = False,
+        store: Optional[EntityStore] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
         self._auth = auth
+        self._store = store
+        self._cache = cache
         self.request = self._auth.request
         super().__init__()
+        if warm_up:
+            self._warm_up_validators()
+
+    def close(self) -> None:
+        self._auth.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
     def get_lead(self, lead_id: int) -> LeadType:
+        local = self._local_object(LEADS, self._lead_model, lead_id)
+        if local is not None:
+            return local
+
         response = self.request(
             method="GET",
             path=f"/leads/{lead_id}",
             params={"with": "contacts,loss_reason"},
         )
-        return self._lead_model.model_validate_json(json_data=response.content)
+        lead = self._lead_model.model_validate_json(
+            json_data=response.content, context=API_CONTEXT
+        )
+        self._keep_object(LEADS, lead_id, response.content)
+        return lead
 
     def get_lead_links(self, lead_id: int) -> List[LinkSchema]:
         response = self.request(
             method="GET",
             path=f"/leads/{lead_id}/links",
         )
-        return (
-            ListModelSchema[LinkSchema]
-            .model_validate_json(response.content)
-            .embedded.objects
-        )
+        return self._parse_response(LinkSchema, response)
 
     def get_lead_list(
-        self, filters: List[Filter] = [], limit: int = 50
+        self,
+        filters: List[Filter] = [],
+        limit: int = 50,
+        prefetch: int = 0,
+        stream: bool = False,
+        mode: ListMode = "model",
     ) -> Iterable[LeadType]:
         model = self._lead_model
         params = {"with": "contacts,loss_reason", "limit": limit, "page": 1}
         params.update(self._filters_to_params(filters))
         return self._objects_list_generator(
-            object_type=model, path="/leads", params=params
+            object_type=model,
+            path="/leads",
+            params=params,
+            prefetch=prefetch,
+            stream=stream,
+            mode=mode,
         )
 
     def create_lead(self, lead: LeadType) -> LeadType:
         response = self.request(
-            method="POST", path="/leads", json=[lead.model_dump(exclude_unset=True)]
+            method="POST", path="/leads", json=[self._create_payload(lead)]
         )
-        return response.content
+        return self._created(lead, response.content)
 
     def create_complex_lead(
         self, lead: LeadType, contact: ContactType
     ) -> ComplexCreateResponseSchema:
-        lead_data = lead.model_dump(exclude_unset=True)
-        contact_data = contact.model_dump(exclude_unset=True)
-        lead_data["_embedded"] = {}
-        lead_data["_embedded"]["contacts"] = [contact_data]
+        lead_data = self._complex_payload(lead, [contact])
         response = self.request(method="POST", path="/leads/complex", json=[lead_data])
 
-        return TypeAdapter(List[ComplexCreateResponseSchema]).validate_json(
-            response.content
-        )[0]
+        return self._parse_complex_created(response.content)[0]
+
+    def create_complex_leads(
+        self, items: Iterable[ComplexLeadSchema], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        return self._send_batches(
+            method="POST",
+            path="/leads/complex",
+            objects=items,
+            payload_fn=self._complex_lead_payload,
+            parse_fn=self._parse_complex_created,
+            max_workers=max_workers,
+            batch_size=COMPLEX_BATCH_SIZE,
+        )
 
     def update_lead(self, lead: LeadType) -> UpdateResponseSchema:
         lead_id = lead.id
+        if self._unchanged(lead):
+            return self._unchanged_response(lead)
+
         response = self.request(
             method="PATCH",
             path=f"/leads/{lead_id}",
-            json=lead.model_dump(exclude_unset=True, by_alias=True),
+            json=self._update_payload(lead),
+        )
+        self._invalidate(LEADS, [lead_id])
+        result = UpdateResponseSchema.model_validate_json(json_data=response.content)
+        self._mark_saved(lead, result.updated_at)
+        return result
+
+    def create_leads(
+        self, leads: Iterable[LeadType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        return self._send_batches(
+            method="POST",
+            path="/leads",
+            objects=leads,
+            payload_fn=self._create_payload,
+            parse_fn=self._parse_created,
+            max_workers=max_workers,
         )
-        return UpdateResponseSchema.model_validate_json(json_data=response.content)
+
+    def update_leads(
+        self, leads: Iterable[LeadType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        changed, skipped = self._split_unchanged(leads)
+        results = self._send_batches(
+            method="PATCH",
+            path="/leads",
+            objects=[obj for _, obj in changed],
+            payload_fn=self._update_payload,
+            parse_fn=self._parse_updated,
+            max_workers=max_workers,
+            require_id=True,
+        )
+        self._invalidate(LEADS, [result.item.id for result in results])
+        return self._merge_skipped(changed, results, skipped)
 
     def get_contact(self, contact_id: int) -> ContactType:
+        local = self._local_object(CONTACTS, self._contact_model, contact_id)
+        if local is not None:
+            return local
+
         response = self.request(
             method="GET", path=f"/contacts/{contact_id}", params={"with": "leads"}
         )
-        return self._contact_model.model_validate_json(json_data=response.content)
+        contact = self._contact_model.model_validate_json(
+            json_data=response.content, context=API_CONTEXT
+        )
+        self._keep_object(CONTACTS, contact_id, response.content)
+        return contact
 
     def get_contact_links(self, contact_id: int) -> List[LinkSchema]:
         response = self.request(
             method="GET",
             path=f"/contacts/{contact_id}/links",
         )
-        return (
-            ListModelSchema[LinkSchema]
-            .model_validate_json(response.content)
-            .embedded.objects
-        )
+        return self._parse_response(LinkSchema, response)
 
     def get_contact_list(
-        self, filters: List[Filter] = [], limit: int = 50
+        self,
+        filters: List[Filter] = [],
+        limit: int = 50,
+        prefetch: int = 0,
+        stream: bool = False,
+        mode: ListMode = "model",
     ) -> Iterable[ContactType]:
         model = self._contact_model
         params = {"with": "leads", "limit": limit, "page": 1}
         params.update(self._filters_to_params(filters))
         return self._objects_list_generator(
-            object_type=model, path="/contacts", params=params
+            object_type=model,
+            path="/contacts",
+            params=params,
+            prefetch=prefetch,
+            stream=stream,
+            mode=mode,
         )
 
     def create_contact(self, contact: ContactType) -> ContactType:
         response = self.request(
             method="POST",
             path="/contacts",
-            json=[contact.model_dump(exclude_unset=True)],
+            json=[self._create_payload(contact)],
         )
-        return response.content
+        return self._created(contact, response.content)
 
     def update_contact(self, contact: ContactType) -> UpdateResponseSchema:
         contact_id = contact.id
+        if self._unchanged(contact):
+            return self._unchanged_response(contact)
+
         response = self.request(
             method="PATCH",
             path=f"/contacts/{contact_id}",
-            json=contact.model_dump(exclude_unset=True, by_alias=True),
+            json=self._update_payload(contact),
+        )
+        self._invalidate(CONTACTS, [contact_id])
+        result = UpdateResponseSchema.model_validate_json(json_data=response.content)
+        self._mark_saved(contact, result.updated_at)
+        return result
+
+    def create_contacts(
+        self, contacts: Iterable[ContactType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        return self._send_batches(
+            method="POST",
+            path="/contacts",
+            objects=contacts,
+            payload_fn=self._create_payload,
+            parse_fn=self._parse_created,
+            max_workers=max_workers,
         )
-        return UpdateResponseSchema.model_validate_json(json_data=response.content)
+
+    def update_contacts(
+        self, contacts: Iterable[ContactType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        changed, skipped = self._split_unchanged(contacts)
+        results = self._send_batches(
+            method="PATCH",
+            path="/contacts",
+            objects=[obj for _, obj in changed],
+            payload_fn=self._update_payload,
+            parse_fn=self._parse_updated,
+            max_workers=max_workers,
+            require_id=True,
+        )
+        self._invalidate(CONTACTS, [result.item.id for result in results])
+        return self._merge_skipped(changed, results, skipped)
 
     def get_pipeline(self, pipeline_id: int) -> PipelineSchema:
+        local = self._local_object(PIPELINES, PipelineSchema, pipeline_id)
+        if local is not None:
+            return local
+
         response = self.request(method="GET", path=f"/leads/pipelines/{pipeline_id}")
-        return PipelineSchema.model_validate_json(response.content)
+        pipeline = PipelineSchema.model_validate_json(response.content)
+        self._keep_object(PIPELINES, pipeline_id, response.content)
+        return pipeline
 
     def get_pipeline_list(self) -> List[PipelineSchema]:
         response = self.request(method="GET", path="/leads/pipelines")
-        return (
-            ListModelSchema[PipelineSchema]
-            .model_validate_json(json_data=response.content)
-            .embedded.objects
-        )
+        return self._parse_response(PipelineSchema, response)
 
     def get_pipeline_status(self, pipeline_id: int, status_id: int) -> StatusSchema:
         response = self.request(
@@ -153,25 +299,33 @@ class AmoCRMApi(Generic[LeadType, ContactType]):
         response = self.request(
             method="GET", path=f"/leads/pipelines/{pipeline_id}/statuses"
         )
-        return (
-            ListModelSchema[StatusSchema]
-            .model_validate_json(response.content)
-            .embedded.objects
-        )
+        return self._parse_response(StatusSchema, response)
 
-    def get_custom_field(self, field_id: int) -> CustomFieldSchema:
-        response = self.request(method="GET", path=f"/leads/custom_fields/{field_id}")
+    def get_custom_field(
+        self, field_id: int, entity: EntityType = "leads"
+    ) -> CustomFieldSchema:
+        response = self.request(
+            method="GET", path=f"/{entity}/custom_fields/{field_id}"
+        )
         return CustomFieldSchema.model_validate_json(response.content)
 
-    def get_custom_field_list(self) -> Iterable[CustomFieldSchema]:
+    def get_custom_field_list(
+        self, entity: EntityType = "leads"
+    ) -> Iterable[CustomFieldSchema]:
         # params = {"limit": 2, "page": 1}
         return self._objects_list_generator(
-            object_type=CustomFieldSchema, path="/leads/custom_fields"
+            object_type=CustomFieldSchema, path=f"/{entity}/custom_fields"
         )
 
     def get_user(self, user_id: int) -> UserSchema:
+        local = self._local_object(USERS, UserSchema, user_id)
+        if local is not None:
+            return local
+
         response = self.request(method="GET", path=f"/users/{user_id}")
-        return UserSchema.model_validate_json(response.content)
+        user = UserSchema.model_validate_json(response.content)
+        self._keep_object(USERS, user_id, response.content)
+        return user
 
     def get_users(self) -> Iterable[UserSchema]:
         return self._objects_list_generator(object_type=UserSchema, path="/users")
@@ -184,59 +338,150 @@ class AmoCRMApi(Generic[LeadType, ContactType]):
 
     def get_loss_reason_list(self) -> List[LeadLossReasonSchema]:
         response = self.request(method="GET", path="/leads/loss_reasons")
-        return (
-            ListModelSchema[LeadLossReasonSchema]
-            .model_validate_json(response.content)
-            .embedded.objects
-        )
+        return self._parse_response(LeadLossReasonSchema, response)
 
     def get_lead_tags(self) -> Iterable[TagSchema]:
         return self._objects_list_generator(object_type=TagSchema, path="/leads/tags")
 
-    @staticmethod
-    def _filters_to_params(filters: List[Filter]) -> Dict[str, Any]:
-        params = dict()
-        for filter_obj in filters:
-            params.update(filter_obj._as_params())
-        return params
-
-    @cached_property
-    def _lead_model(self) -> type[LeadType]:
-        args = get_args(self.__orig_class__)  # type: ignore
-        base_type: type[LeadType] = LeadSchema  # type: ignore
-        for arg in args:
-            if issubclass(arg, base_type):
-                return arg
-        return base_type
-
-    @cached_property
-    def _contact_model(self) -> Type[ContactType]:
-        args = get_args(self.__orig_class__)  # type: ignore
-        base_type: Type[ContactType] = ContactSchema  # type: ignore
-        for arg in args:
-            if issubclass(arg, base_type):
-                return arg
-        return base_type
-
     def _objects_list_generator(
-        self, object_type: type, path: str, params: Optional[dict] = None, limit=250
+        self,
+        object_type: type,
+        path: str,
+        params: Optional[dict] = None,
+        limit=250,
+        prefetch: int = 0,
+        stream: bool = False,
+        mode: ListMode = "model",
     ) -> Iterable[Any]:
         params = params if params else {}
         params["limit"] = params.get("limit", limit)
         params["page"] = params.get("page", 1)
 
+        if stream:
+            if prefetch > 0:
+                raise ValueError("prefetch can't be used with stream")
+            yield from self._streamed_objects_list(object_type, path, params, mode)
+            return
+
+        if prefetch > 0:
+            yield from self._prefetched_objects_list(
+                object_type, path, params, prefetch, mode
+            )
+            return
+
         while True:
-            response = self.request(method="GET", path=path, params=params)
-            
-            if response.status_code != 200:
+            item_list = self._get_objects_page(object_type, path, params, mode)
+            if item_list is None:
                 break
-            item_list = (
-                ListModelSchema[object_type]  # type: ignore
-                .model_validate_json(response.content)
-                .embedded.objects
-            )
 
             for item in item_list:
                 yield item
 
             params["page"] += 1
+
+    def _prefetched_objects_list(
+        self,
+        object_type: type,
+        path: str,
+        params: dict,
+        prefetch: int,
+        mode: ListMode = "model",
+    ) -> Iterable[Any]:
+        # keeps `prefetch` pages requested ahead of the consumer, so at most
+        # prefetch + 1 pages are held in memory at once
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        pending: Deque[Future] = deque()
+        next_page = params["page"]
+
+        def submit_next() -> None:
+            nonlocal next_page
+            page_params = {**params, "page": next_page}
+            pending.append(
+                executor.submit(
+                    self._get_objects_page, object_type, path, page_params, mode
+                )
+            )
+            next_page += 1
+
+        try:
+            for _ in range(prefetch):
+                submit_next()
+
+            while pending:
+                item_list = pending.popleft().result()
+                if item_list is None:
+                    break
+                submit_next()
+
+                for item in item_list:
+                    yield item
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _streamed_objects_list(
+        self, object_type: type, path: str, params: dict, mode: ListMode = "model"
+    ) -> Iterable[Any]:
+        # items are parsed and validated as the body arrives, so one entity
+        # instead of one page is held in memory at a time
+        items_path, kind = self._stream_target(path)
+        convert = self._item_converter(object_type, mode)
+        while True:
+            response = self.request(method="GET", path=path, params=params, stream=True)
+            with response:
+                if response.status_code != 200:
+                    break
+                for items in iter_array_batches(
+                    response.iter_content(STREAM_CHUNK_SIZE), items_path
+                ):
+                    # stored before they are handed out and maybe modified
+                    if kind is not None:
+                        self._store.upsert(kind, items)  # type: ignore
+                    for item in items:
+                        yield item if convert is None else convert(item)
+            params["page"] += 1
+
+    def _get_objects_page(
+        self, object_type: type, path: str, params: dict, mode: ListMode = "model"
+    ) -> Optional[List[Any]]:
+        response = self.request(method="GET", path=path, params=params)
+
+        if response.status_code != 200:
+            return None
+        if mode != "model":
+            convert = self._item_converter(object_type, mode)
+            items = self._page_items(path, response.content)
+            return items if convert is None else [convert(item) for item in items]
+        self._store_page(path, response.content)
+        return self._parse_response(object_type, response)
+
+    def _send_batches(
+        self,
+        method: Literal["POST", "PATCH"],
+        path: str,
+        objects: Iterable[Any],
+        payload_fn: Callable[[Any], dict],
+        parse_fn: Callable[[bytes], List[Any]],
+        max_workers: int = 1,
+        require_id: bool = False,
+        batch_size: int = BATCH_SIZE,
+    ) -> List[BatchItemResultSchema]:
+        items, chunks = self._batch_payloads(
+            objects, payload_fn, require_id, batch_size
+        )
+
+        def send(chunk: Tuple[int, List[dict]]) -> List[BatchItemResultSchema]:
+            offset, payloads = chunk
+            try:
+                response = self.request(method=method, path=path, json=payloads)
+            except ValidationError as e:
+                return self._batch_errors(items, offset, len(payloads), e.args[0])
+            return self._batch_results(
+                items, offset, len(payloads), parse_fn(response.content)
+            )
+
+        if max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                parts = list(executor.map(send, chunks))
+        else:
+            parts = [send(chunk) for chunk in chunks]
+        return [result for part in parts for result in part]
@@ -0,0 +1,502 @@
+import asyncio
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+from .auth import AsyncBaseAuth
+from .base_api import (
+    BATCH_SIZE,
+    COMPLEX_BATCH_SIZE,
+    STREAM_CHUNK_SIZE,
+    BaseAmoCRMApi,
+    ContactType,
+    EntityType,
+    ListMode,
+    LeadType,
+)
+from .cache import PIPELINES, USERS, ResponseCache
+from .exceptions import ValidationError
+from .filters import Filter
+from .schemas import (
+    BatchItemResultSchema,
+    ComplexCreateResponseSchema,
+    ComplexLeadSchema,
+    CustomFieldSchema,
+    PipelineSchema,
+    StatusSchema,
+    UpdateResponseSchema,
+    UserSchema,
+    LinkSchema,
+    LeadLossReasonSchema,
+    TagSchema,
+)
+from .schemas.base_model import API_CONTEXT
+from .store import CONTACTS, LEADS, EntityStore
+from .streaming import aiter_array_batches
+
+
+class AsyncAmoCRMApi(BaseAmoCRMApi[LeadType, ContactType]):
+    _auth: AsyncBaseAuth
+
+    def __init__(
+        self,
+        auth: AsyncBaseAuth,
+        warm_up: bool = False,
+        store: Optional[EntityStore] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self._auth = auth
+        self._store = store
+        self._cache = cache
+        self.request = self._auth.request
+        super().__init__()
+        if warm_up:
+            self._warm_up_validators()
+
+    async def aclose(self) -> None:
+        await self._auth.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def get_lead(self, lead_id: int) -> LeadType:
+        local = self._local_object(LEADS, self._lead_model, lead_id)
+        if local is not None:
+            return local
+
+        response = await self.request(
+            method="GET",
+            path=f"/leads/{lead_id}",
+            params={"with": "contacts,loss_reason"},
+        )
+        lead = self._lead_model.model_validate_json(
+            json_data=response.content, context=API_CONTEXT
+        )
+        self._keep_object(LEADS, lead_id, response.content)
+        return lead
+
+    async def get_lead_links(self, lead_id: int) -> List[LinkSchema]:
+        response = await self.request(
+            method="GET",
+            path=f"/leads/{lead_id}/links",
+        )
+        return self._parse_response(LinkSchema, response)
+
+    def get_lead_list(
+        self,
+        filters: List[Filter] = [],
+        limit: int = 50,
+        prefetch: int = 0,
+        stream: bool = False,
+        mode: ListMode = "model",
+    ) -> AsyncIterator[LeadType]:
+        model = self._lead_model
+        params = {"with": "contacts,loss_reason", "limit": limit, "page": 1}
+        params.update(self._filters_to_params(filters))
+        return self._objects_list_generator(
+            object_type=model,
+            path="/leads",
+            params=params,
+            prefetch=prefetch,
+            stream=stream,
+            mode=mode,
+        )
+
+    async def create_lead(self, lead: LeadType) -> LeadType:
+        response = await self.request(
+            method="POST", path="/leads", json=[self._create_payload(lead)]
+        )
+        return self._created(lead, response.content)
+
+    async def create_complex_lead(
+        self, lead: LeadType, contact: ContactType
+    ) -> ComplexCreateResponseSchema:
+        lead_data = self._complex_payload(lead, [contact])
+        response = await self.request(
+            method="POST", path="/leads/complex", json=[lead_data]
+        )
+
+        return self._parse_complex_created(response.content)[0]
+
+    async def create_complex_leads(
+        self, items: Iterable[ComplexLeadSchema], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        return await self._send_batches(
+            method="POST",
+            path="/leads/complex",
+            objects=items,
+            payload_fn=self._complex_lead_payload,
+            parse_fn=self._parse_complex_created,
+            max_workers=max_workers,
+            batch_size=COMPLEX_BATCH_SIZE,
+        )
+
+    async def update_lead(self, lead: LeadType) -> UpdateResponseSchema:
+        lead_id = lead.id
+        if self._unchanged(lead):
+            return self._unchanged_response(lead)
+
+        response = await self.request(
+            method="PATCH",
+            path=f"/leads/{lead_id}",
+            json=self._update_payload(lead),
+        )
+        self._invalidate(LEADS, [lead_id])
+        result = UpdateResponseSchema.model_validate_json(json_data=response.content)
+        self._mark_saved(lead, result.updated_at)
+        return result
+
+    async def create_leads(
+        self, leads: Iterable[LeadType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        return await self._send_batches(
+            method="POST",
+            path="/leads",
+            objects=leads,
+            payload_fn=self._create_payload,
+            parse_fn=self._parse_created,
+            max_workers=max_workers,
+        )
+
+    async def update_leads(
+        self, leads: Iterable[LeadType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        changed, skipped = self._split_unchanged(leads)
+        results = await self._send_batches(
+            method="PATCH",
+            path="/leads",
+            objects=[obj for _, obj in changed],
+            payload_fn=self._update_payload,
+            parse_fn=self._parse_updated,
+            max_workers=max_workers,
+            require_id=True,
+        )
+        self._invalidate(LEADS, [result.item.id for result in results])
+        return self._merge_skipped(changed, results, skipped)
+
+    async def get_contact(self, contact_id: int) -> ContactType:
+        local = self._local_object(CONTACTS, self._contact_model, contact_id)
+        if local is not None:
+            return local
+
+        response = await self.request(
+            method="GET", path=f"/contacts/{contact_id}", params={"with": "leads"}
+        )
+        contact = self._contact_model.model_validate_json(
+            json_data=response.content, context=API_CONTEXT
+        )
+        self._keep_object(CONTACTS, contact_id, response.content)
+        return contact
+
+    async def get_contact_links(self, contact_id: int) -> List[LinkSchema]:
+        response = await self.request(
+            method="GET",
+            path=f"/contacts/{contact_id}/links",
+        )
+        return self._parse_response(LinkSchema, response)
+
+    def get_contact_list(
+        self,
+        filters: List[Filter] = [],
+        limit: int = 50,
+        prefetch: int = 0,
+        stream: bool = False,
+        mode: ListMode = "model",
+    ) -> AsyncIterator[ContactType]:
+        model = self._contact_model
+        params = {"with": "leads", "limit": limit, "page": 1}
+        params.update(self._filters_to_params(filters))
+        return self._objects_list_generator(
+            object_type=model,
+            path="/contacts",
+            params=params,
+            prefetch=prefetch,
+            stream=stream,
+            mode=mode,
+        )
+
+    async def create_contact(self, contact: ContactType) -> ContactType:
+        response = await self.request(
+            method="POST",
+            path="/contacts",
+            json=[self._create_payload(contact)],
+        )
+        return self._created(contact, response.content)
+
+    async def update_contact(self, contact: ContactType) -> UpdateResponseSchema:
+        contact_id = contact.id
+        if self._unchanged(contact):
+            return self._unchanged_response(contact)
+
+        response = await self.request(
+            method="PATCH",
+            path=f"/contacts/{contact_id}",
+            json=self._update_payload(contact),
+        )
+        self._invalidate(CONTACTS, [contact_id])
+        result = UpdateResponseSchema.model_validate_json(json_data=response.content)
+        self._mark_saved(contact, result.updated_at)
+        return result
+
+    async def create_contacts(
+        self, contacts: Iterable[ContactType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        return await self._send_batches(
+            method="POST",
+            path="/contacts",
+            objects=contacts,
+            payload_fn=self._create_payload,
+            parse_fn=self._parse_created,
+            max_workers=max_workers,
+        )
+
+    async def update_contacts(
+        self, contacts: Iterable[ContactType], max_workers: int = 1
+    ) -> List[BatchItemResultSchema]:
+        changed, skipped = self._split_unchanged(contacts)
+        results = await self._send_batches(
+            method="PATCH",
+            path="/contacts",
+            objects=[obj for _, obj in changed],
+            payload_fn=self._update_payload,
+            parse_fn=self._parse_updated,
+            max_workers=max_workers,
+            require_id=True,
+        )
+        self._invalidate(CONTACTS, [result.item.id for result in results])
+        return self._merge_skipped(changed, results, skipped)
+
+    async def get_pipeline(self, pipeline_id: int) -> PipelineSchema:
+        local = self._local_object(PIPELINES, PipelineSchema, pipeline_id)
+        if local is not None:
+            return local
+
+        response = await self.request(
+            method="GET", path=f"/leads/pipelines/{pipeline_id}"
+        )
+        pipeline = PipelineSchema.model_validate_json(response.content)
+        self._keep_object(PIPELINES, pipeline_id, response.content)
+        return pipeline
+
+    async def get_pipeline_list(self) -> List[PipelineSchema]:
+        response = await self.request(method="GET", path="/leads/pipelines")
+        return self._parse_response(PipelineSchema, response)
+
+    async def get_pipeline_status(
+        self, pipeline_id: int, status_id: int
+    ) -> StatusSchema:
+        response = await self.request(
+            method="GET", path=f"/leads/pipelines/{pipeline_id}/statuses/{status_id}"
+        )
+        return StatusSchema.model_validate_json(response.content)
+
+    async def get_pipeline_status_list(self, pipeline_id: int) -> List[StatusSchema]:
+        response = await self.request(
+            method="GET", path=f"/leads/pipelines/{pipeline_id}/statuses"
+        )
+        return self._parse_response(StatusSchema, response)
+
+    async def get_custom_field(
+        self, field_id: int, entity: EntityType = "leads"
+    ) -> CustomFieldSchema:
+        response = await self.request(
+            method="GET", path=f"/{entity}/custom_fields/{field_id}"
+        )
+        return CustomFieldSchema.model_validate_json(response.content)
+
+    def get_custom_field_list(
+        self, entity: EntityType = "leads"
+    ) -> AsyncIterator[CustomFieldSchema]:
+        # params = {"limit": 2, "page": 1}
+        return self._objects_list_generator(
+            object_type=CustomFieldSchema, path=f"/{entity}/custom_fields"
+        )
+
+    async def get_user(self, user_id: int) -> UserSchema:
+        local = self._local_object(USERS, UserSchema, user_id)
+        if local is not None:
+            return local
+
+        response = await self.request(method="GET", path=f"/users/{user_id}")
+        user = UserSchema.model_validate_json(response.content)
+        self._keep_object(USERS, user_id, response.content)
+        return user
+
+    def get_users(self) -> AsyncIterator[UserSchema]:
+        return self._objects_list_generator(object_type=UserSchema, path="/users")
+
+    async def get_loss_reason(self, loss_reason_id: int) -> LeadLossReasonSchema:
+        response = await self.request(
+            method="GET", path=f"/leads/loss_reasons/{loss_reason_id}"
+        )
+        return LeadLossReasonSchema.model_validate_json(response.content)
+
+    async def get_loss_reason_list(self) -> List[LeadLossReasonSchema]:
+        response = await self.request(method="GET", path="/leads/loss_reasons")
+        return self._parse_response(LeadLossReasonSchema, response)
+
+    def get_lead_tags(self) -> AsyncIterator[TagSchema]:
+        return self._objects_list_generator(object_type=TagSchema, path="/leads/tags")
+
+    async def _objects_list_generator(
+        self,
+        object_type: type,
+        path: str,
+        params: Optional[dict] = None,
+        limit=250,
+        prefetch: int = 0,
+        stream: bool = False,
+        mode: ListMode = "model",
+    ) -> AsyncIterator[Any]:
+        params = params if params else {}
+        params["limit"] = params.get("limit", limit)
+        params["page"] = params.get("page", 1)
+
+        if stream:
+            if prefetch > 0:
+                raise ValueError("prefetch can't be used with stream")
+            async for item in self._streamed_objects_list(
+                object_type, path, params, mode
+            ):
+                yield item
+            return
+
+        if prefetch > 0:
+            async for item in self._prefetched_objects_list(
+                object_type, path, params, prefetch, mode
+            ):
+                yield item
+            return
+
+        while True:
+            item_list = await self._get_objects_page(object_type, path, params, mode)
+            if item_list is None:
+                break
+
+            for item in item_list:
+                yield item
+
+            params["page"] += 1
+
+    async def _prefetched_objects_list(
+        self,
+        object_type: type,
+        path: str,
+        params: dict,
+        prefetch: int,
+        mode: ListMode = "model",
+    ) -> AsyncIterator[Any]:
+        # keeps `prefetch` pages requested ahead of the consumer, so at most
+        # prefetch + 1 pages are held in memory at once
+        pending: Deque[asyncio.Task] = deque()
+        next_page = params["page"]
+
+        def submit_next() -> None:
+            nonlocal next_page
+            page_params = {**params, "page": next_page}
+            pending.append(
+                asyncio.create_task(
+                    self._get_objects_page(object_type, path, page_params, mode)
+                )
+            )
+            next_page += 1
+
+        try:
+            for _ in range(prefetch):
+                submit_next()
+
+            while pending:
+                item_list = await pending.popleft()
+                if item_list is None:
+                    break
+                submit_next()
+
+                for item in item_list:
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _streamed_objects_list(
+        self, object_type: type, path: str, params: dict, mode: ListMode = "model"
+    ) -> AsyncIterator[Any]:
+        # items are parsed and validated as the body arrives, so one entity
+        # instead of one page is held in memory at a time
+        items_path, kind = self._stream_target(path)
+        convert = self._item_converter(object_type, mode)
+        while True:
+            response = await self.request(
+                method="GET", path=path, params=params, stream=True
+            )
+            try:
+                if response.status_code != 200:
+                    break
+                async for items in aiter_array_batches(
+                    response.aiter_bytes(STREAM_CHUNK_SIZE), items_path
+                ):
+                    # stored before they are handed out and maybe modified
+                    if kind is not None:
+                        self._store.upsert(kind, items)  # type: ignore
+                    for item in items:
+                        yield item if convert is None else convert(item)
+            finally:
+                await response.aclose()
+            params["page"] += 1
+
+    async def _get_objects_page(
+        self, object_type: type, path: str, params: dict, mode: ListMode = "model"
+    ) -> Optional[List[Any]]:
+        response = await self.request(method="GET", path=path, params=params)
+
+        if response.status_code != 200:
+            return None
+        if mode != "model":
+            convert = self._item_converter(object_type, mode)
+            items = self._page_items(path, response.content)
+            return items if convert is None else [convert(item) for item in items]
+        self._store_page(path, response.content)
+        return self._parse_response(object_type, response)
+
+    async def _send_batches(
+        self,
+        method: Literal["POST", "PATCH"],
+        path: str,
+        objects: Iterable[Any],
+        payload_fn: Callable[[Any], dict],
+        parse_fn: Callable[[bytes], List[Any]],
+        max_workers: int = 1,
+        require_id: bool = False,
+        batch_size: int = BATCH_SIZE,
+    ) -> List[BatchItemResultSchema]:
+        items, chunks = self._batch_payloads(
+            objects, payload_fn, require_id, batch_size
+        )
+        semaphore = asyncio.Semaphore(max(max_workers, 1))
+
+        async def send(chunk: Tuple[int, List[dict]]) -> List[BatchItemResultSchema]:
+            offset, payloads = chunk
+            async with semaphore:
+                try:
+                    response = await self.request(
+                        method=method, path=path, json=payloads
+                    )
+                except ValidationError as e:
+                    return self._batch_errors(items, offset, len(payloads), e.args[0])
+            return self._batch_results(
+                items, offset, len(payloads), parse_fn(response.content)
+            )
+
+        parts = await asyncio.gather(*(send(chunk) for chunk in chunks))
+        return [result for part in parts for result in part]
@@ -1,3 +1,6 @@
+from .async_base import AsyncBaseAuth
+from .async_oauth import AsyncAmoCRMAuth
+from .async_token_auth import AsyncAmoCRMTokenAuth
 from .base import BaseAuth
 from .oauth import AmoCRMAuth
 from .token_auth import AmoCRMTokenAuth
@@ -0,0 +1,176 @@
+import asyncio
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Literal, Optional, Union
+
+from .. import retry
+from ..rate_limit import TokenBucket, get_rate_limiter
+from ..retry import RetryPolicy
+from ..revalidation import Revalidator
+from .base import check_response
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient, Response
+
+
+class AsyncBaseAuth(ABC):
+    def __init__(
+        self,
+        subdomain: str,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        timeout: float = 5,
+        connect_timeout: Optional[float] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        revalidator: Optional[Revalidator] = None,
+    ) -> None:
+        if httpx is None:
+            raise ImportError(
+                "httpx is required for the async client, "
+                "install it with 'pip install amo_crm_api[async]'"
+            )
+        self._subdomain = subdomain
+        self._api_v = "/api/v4"
+        self._url = f"https://{self._subdomain}.amocrm.ru"
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._connect_timeout = connect_timeout
+        self._client: Optional["AsyncClient"] = None
+        self.rate_limiter = (
+            rate_limiter if rate_limiter else get_rate_limiter(self._subdomain)
+        )
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.revalidator = revalidator
+
+    @property
+    def client(self) -> "AsyncClient":
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> "AsyncClient":
+        limits = httpx.Limits(
+            max_connections=self._pool_maxsize,
+            max_keepalive_connections=self._pool_maxsize if self._keep_alive else 0,
+        )
+        connect_timeout = (
+            self._connect_timeout
+            if self._connect_timeout is not None
+            else self._timeout
+        )
+        timeout = httpx.Timeout(self._timeout, connect=connect_timeout)
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def request(
+        self,
+        method: Literal["GET", "OPTIONS", "HEAD", "POST", "PUT", "PATCH", "DELETE"],
+        path: str = "",
+        url: Optional[str] = None,
+        params: Optional[dict] = None,
+        data: Optional[dict] = None,
+        json: Optional[Union[dict, list]] = None,
+        stream: bool = False,
+    ) -> "Response":
+        """
+        With `stream` the body is read only when the response is consumed,
+        the caller has to close it.
+        """
+        request_url = url + path if url else self._url + self._api_v + path
+        self.retry_policy.on_request()
+        revalidator = self.revalidator
+        revalidation_key = None
+        headers: Dict[str, str] = {}
+        if revalidator is not None and not url:
+            revalidation_key = revalidator.key(method, path, params)
+            if revalidation_key is not None:
+                headers = revalidator.request_headers(revalidation_key)
+
+        send = partial(
+            self._send, method, request_url, params, data, json, stream=stream
+        )
+        response = await send(headers)
+        if stream and (revalidation_key is not None or response.status_code >= 400):
+            # both need the body
+            await response.aread()
+        if revalidator is not None and revalidation_key is not None:
+            if not revalidator.on_response(revalidation_key, response):
+                # a 304 for a body evicted meanwhile, ask for the full one
+                await response.aclose()
+                response = await send({})
+                if stream:
+                    await response.aread()
+                revalidator.on_response(revalidation_key, response)
+        check_response(response)
+        return response
+
+    async def _send(
+        self,
+        method: str,
+        request_url: str,
+        params: Optional[dict],
+        data: Optional[dict],
+        json: Optional[Union[dict, list]],
+        headers: Dict[str, str],
+        stream: bool = False,
+    ) -> "Response":
+        """The request, retried as the retry policy says."""
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            error: Optional[Exception] = None
+            retry_after = None
+            try:
+                request = self.client.build_request(
+                    method=method,
+                    url=request_url,
+                    params=params,
+                    data=data,
+                    json=json,
+                    headers={**headers, **await self._auth_headers()},
+                )
+                response = await self.client.send(request, stream=stream)
+            except (httpx.ConnectTimeout, httpx.ConnectError) as e:
+                error, reason = e, retry.CONNECT
+            except httpx.ReadTimeout as e:
+                error, reason = e, retry.READ
+            except httpx.TransportError as e:
+                error, reason = e, retry.CONNECTION
+            else:
+                status_reason = self.retry_policy.status_reason(response.status_code)
+                if status_reason is None:
+                    break
+                reason = status_reason
+                retry_after = response.headers.get("Retry-After")
+
+            delay = self.retry_policy.next_delay(method, attempt, reason, retry_after)
+            if delay is None:
+                if error is not None:
+                    raise error
+                break
+            if error is None and stream:
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+        return response
+
+    @abstractmethod
+    async def _auth_headers(self) -> Dict[str, str]:
+        raise NotImplementedError
@@ -0,0 +1,122 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+
+from .async_base import AsyncBaseAuth
+from .oauth import OAuthTokensMixin, TokensDict
+from .storage import BaseTokenStorage
+
+T = TypeVar("T")
+
+
+class AsyncAmoCRMAuth(OAuthTokensMixin, AsyncBaseAuth):
+    def __init__(
+        self,
+        subdomain: str,
+        client_id: str,
+        client_secret: str,
+        redirect_url: str,
+        storage: Optional[BaseTokenStorage] = None,
+        refresh_margin: float = 60,
+        **kwargs: Any,
+    ) -> None:
+        self._init_oauth(
+            client_id, client_secret, redirect_url, storage, refresh_margin
+        )
+        self._refresh_lock_instance: Optional[asyncio.Lock] = None
+        super().__init__(subdomain, **kwargs)
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {await self._get_access_token()}"}
+
+    async def init(self, code: str, skip_error: bool = False):
+        async with self._refresh_lock, self._storage_lock():
+            data = await self._get_or_update_tokens(code=code, skip_error=skip_error)
+            if not data:
+                return
+            await self._in_thread(self._save_tokens, data)
+
+    async def _update_tokens(self) -> str:
+        refresh_token = await self._in_thread(self._storage.get_refresh_token)
+
+        data = await self._get_or_update_tokens(refresh_token=refresh_token)
+        if not data:
+            raise
+        await self._in_thread(self._save_tokens, data)
+        return data["access_token"]
+
+    async def _get_or_update_tokens(
+        self,
+        refresh_token: Optional[str] = None,
+        code: Optional[str] = None,
+        skip_error: bool = False,
+    ) -> Optional[TokensDict]:
+        data = self._token_request_data(refresh_token=refresh_token, code=code)
+        response = await self.client.request(
+            method="POST", url=self._token_url, json=data
+        )
+        return self._tokens_from_response(response, skip_error)
+
+    async def _get_access_token(self) -> Optional[str]:
+        access_token = await self._in_thread(self._cached_access_token)
+        if access_token:
+            return access_token
+
+        access_token = await self._in_thread(self._stored_access_token)
+        if self._is_cached_expiring():
+            access_token = await self._refresh_access_token()
+
+        return access_token
+
+    async def _refresh_access_token(self) -> str:
+        # tasks of this process wait for a single refresh ...
+        async with self._refresh_lock:
+            access_token = await self._in_thread(self._cached_access_token)
+            if access_token:
+                return access_token
+
+            # ... and so do other processes sharing the storage
+            async with self._storage_lock():
+                access_token = await self._in_thread(self._stored_access_token)
+                if not self._is_cached_expiring():
+                    return access_token
+                return await self._update_tokens()
+
+    @property
+    def _refresh_lock(self) -> asyncio.Lock:
+        # created lazily to bind to the running loop on python 3.9
+        if self._refresh_lock_instance is None:
+            self._refresh_lock_instance = asyncio.Lock()
+        return self._refresh_lock_instance
+
+    @staticmethod
+    async def _in_thread(func: Callable[..., T], *args: Any) -> T:
+        """Run blocking storage I/O in a worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    @asynccontextmanager
+    async def _storage_lock(self) -> AsyncIterator[None]:
+        # storage locks block, so they are taken and released in worker
+        # threads and must not be bound to the thread that acquired them
+        lock = self._storage.lock()
+        loop = asyncio.get_running_loop()
+
+        def release() -> "asyncio.Future[Any]":
+            return loop.run_in_executor(None, lock.__exit__, None, None, None)
+
+        def release_acquired(future: "asyncio.Future[Any]") -> None:
+            if not future.cancelled() and future.exception() is None:
+                release()
+
+        acquire = loop.run_in_executor(None, lock.__enter__)
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # the worker thread still takes the lock, give it back then
+            acquire.add_done_callback(release_acquired)
+            raise
+        try:
+            yield
+        finally:
+            # shielded too, so a cancellation can't drop a queued release
+            await asyncio.shield(release())
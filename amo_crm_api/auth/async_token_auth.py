@@ -0,0 +1,12 @@
+from typing import Any, Dict
+
+from .async_base import AsyncBaseAuth
+
+
+class AsyncAmoCRMTokenAuth(AsyncBaseAuth):
+    def __init__(self, subdomain: str, token: str, **kwargs: Any) -> None:
+        self._token = token
+        super().__init__(subdomain, **kwargs)
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self._token}"}
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
+from functools import partial
 from time import sleep
-from typing import Literal, Optional, Union
+from typing import Dict, Literal, Optional, Tuple, Union
 
-from requests import Response, models, request, exceptions
+from requests import Response, Session, adapters, exceptions, models
+from urllib3.exceptions import NewConnectionError
 
 from ..exceptions import (
     DoesNotExist,
@@ -11,13 +13,97 @@ from ..exceptions import (
     AccountBlockedError,
     ValidationError,
 )
+from .. import retry
+from ..rate_limit import TokenBucket, get_rate_limiter
+from ..retry import RetryPolicy
+from ..revalidation import Revalidator
+
+
+def check_response(response) -> None:
+    if response.status_code == 404:
+        raise DoesNotExist()
+
+    elif response.status_code == 401:
+        raise AuthenticationError()
+
+    elif response.status_code == 400:
+        raise ValidationError(response.json())
+
+    elif response.status_code == 403:
+        raise AccountBlockedError()
+
+    elif response.status_code == 429:
+        raise LimitExceededError()
 
 
 class BaseAuth(ABC):
-    def __init__(self, subdomain: str) -> None:
+    def __init__(
+        self,
+        subdomain: str,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        timeout: float = 5,
+        connect_timeout: Optional[float] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        revalidator: Optional[Revalidator] = None,
+    ) -> None:
         self._subdomain = subdomain
         self._api_v = "/api/v4"
         self._url = f"https://{self._subdomain}.amocrm.ru"
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._connect_timeout = connect_timeout
+        self._session: Optional[Session] = None
+        self.rate_limiter = (
+            rate_limiter if rate_limiter else get_rate_limiter(self._subdomain)
+        )
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.revalidator = revalidator
+
+    @property
+    def _request_timeout(self) -> Union[float, Tuple[float, float]]:
+        if self._connect_timeout is None:
+            return self._timeout
+        return (self._connect_timeout, self._timeout)
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> Session:
+        session = Session()
+        # pool_connections - number of cached per-host pools,
+        # pool_maxsize - connections kept alive per host,
+        # pool_block - never open more than pool_maxsize connections to a host
+        adapter = adapters.HTTPAdapter(
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            pool_block=self._pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self._keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
     def request(
         self,
@@ -27,51 +113,92 @@ class BaseAuth(ABC):
         params: Optional[dict] = None,
         data: Optional[dict] = None,
         json: Optional[Union[dict, list]] = None,
-        tried: int = 0,
+        stream: bool = False,
     ) -> Response:
+        """With `stream` the body is read only when the response is consumed."""
         request_url = url + path if url else self._url + self._api_v + path
-        sleep(0.1)
-        try:
-            response = request(
-                method=method,
-                url=request_url,
-                params=params,
-                data=data,
-                json=json,
-                auth=self._auth,
-                timeout=5,
-            )
-        except exceptions.ReadTimeout:
-            if tried <= 5:
-                return self.request(
+        self.retry_policy.on_request()
+        revalidator = self.revalidator
+        revalidation_key = None
+        headers: Dict[str, str] = {}
+        if revalidator is not None and not url:
+            revalidation_key = revalidator.key(method, path, params)
+            if revalidation_key is not None:
+                headers = revalidator.request_headers(revalidation_key)
+
+        send = partial(
+            self._send, method, request_url, params, data, json, stream=stream
+        )
+        response = send(headers)
+        if revalidator is not None and revalidation_key is not None:
+            if not revalidator.on_response(revalidation_key, response):
+                # a 304 for a body evicted meanwhile, ask for the full one
+                response.close()
+                response = send({})
+                revalidator.on_response(revalidation_key, response)
+        check_response(response)
+        return response
+
+    def _send(
+        self,
+        method: str,
+        request_url: str,
+        params: Optional[dict],
+        data: Optional[dict],
+        json: Optional[Union[dict, list]],
+        headers: Dict[str, str],
+        stream: bool = False,
+    ) -> Response:
+        """The request, retried as the retry policy says."""
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            error: Optional[Exception] = None
+            retry_after = None
+            try:
+                response = self.session.request(
                     method=method,
-                    path=path,
-                    url=url,
+                    url=request_url,
                     params=params,
                     data=data,
                     json=json,
-                    tried=tried + 1,
+                    headers=headers,
+                    auth=self._auth,
+                    timeout=self._request_timeout,
+                    stream=stream,
                 )
+            except exceptions.ConnectTimeout as e:
+                error, reason = e, retry.CONNECT
+            except exceptions.ReadTimeout as e:
+                error, reason = e, retry.READ
+            except exceptions.ConnectionError as e:
+                error, reason = e, self._connection_error_reason(e)
             else:
-                raise exceptions.ReadTimeout()
-
-        if response.status_code == 404:
-            raise DoesNotExist()
-
-        elif response.status_code == 401:
-            raise AuthenticationError()
-
-        elif response.status_code == 400:
-            raise ValidationError(response.json())
-
-        elif response.status_code == 403:
-            raise AccountBlockedError()
-
-        elif response.status_code == 429:
-            raise LimitExceededError()
+                status_reason = self.retry_policy.status_reason(response.status_code)
+                if status_reason is None:
+                    break
+                reason = status_reason
+                retry_after = response.headers.get("Retry-After")
 
+            delay = self.retry_policy.next_delay(method, attempt, reason, retry_after)
+            if delay is None:
+                if error is not None:
+                    raise error
+                break
+            if error is None and stream:
+                response.close()
+            sleep(delay)
+            attempt += 1
         return response
 
+    @staticmethod
+    def _connection_error_reason(error: exceptions.ConnectionError) -> str:
+        # refused / unresolved connections never reached the API
+        cause = error.args[0] if error.args else None
+        if isinstance(getattr(cause, "reason", None), NewConnectionError):
+            return retry.CONNECT
+        return retry.CONNECTION
+
     @abstractmethod
     def _auth(self, r: models.PreparedRequest) -> models.PreparedRequest:
         raise NotImplementedError
@@ -1,8 +1,8 @@
-from datetime import datetime
-from typing import Optional, TypedDict
+import threading
+from time import time
+from typing import Any, Dict, Optional, TypedDict
 
 import jwt
-from requests import request
 
 from .base import BaseAuth
 from .storage import BaseTokenStorage, FileTokenStorage
@@ -13,47 +13,36 @@ class TokensDict(TypedDict):
     refresh_token: str
 
 
-class AmoCRMAuth(BaseAuth):
-    def __init__(
+class OAuthTokensMixin:
+    """Token handling shared by the sync and async OAuth clients."""
+
+    _url: str
+
+    def _init_oauth(
         self,
-        subdomain: str,
         client_id: str,
         client_secret: str,
         redirect_url: str,
         storage: Optional[BaseTokenStorage] = None,
+        refresh_margin: float = 60,
     ) -> None:
         self._storage = storage if storage else FileTokenStorage()
         self._client_id = client_id
         self._client_secret = client_secret
         self._redirect_url = redirect_url
-        super().__init__(subdomain)
-
-    def _auth(self, r):
-        r.headers["Authorization"] = f"Bearer {self._get_access_token()}"
-        return r
-
-    def init(self, code: str, skip_error: bool = False):
-        data = self._get_or_update_tokens(code=code, skip_error=skip_error)
-        if not data:
-            return
-        self._storage.save_tokens(data["access_token"], data["refresh_token"])
-
-    def _update_tokens(self) -> str:
-        refresh_token = self._storage.get_refresh_token()
-
-        data = self._get_or_update_tokens(refresh_token=refresh_token)
-        if not data:
-            raise
-        self._storage.save_tokens(data["access_token"], data["refresh_token"])
-        return data["access_token"]
-
-    def _get_or_update_tokens(
-        self,
-        refresh_token: Optional[str] = None,
-        code: Optional[str] = None,
-        skip_error: bool = False,
-    ) -> Optional[TokensDict]:
-        url = f"{self._url}/oauth2/access_token"
+        # access token is refreshed this many seconds before it expires
+        self._refresh_margin = refresh_margin
+        self._cached_token: Optional[str] = None
+        self._cached_exp = 0.0
+        self._cached_version: Any = None
+
+    @property
+    def _token_url(self) -> str:
+        return f"{self._url}/oauth2/access_token"
+
+    def _token_request_data(
+        self, refresh_token: Optional[str] = None, code: Optional[str] = None
+    ) -> Dict[str, str]:
         data = dict(
             client_id=self._client_id,
             client_secret=self._client_secret,
@@ -69,8 +58,10 @@ class AmoCRMAuth(BaseAuth):
         else:
             raise
 
-        response = request(method="POST", url=url, json=data)
+        return data
 
+    @staticmethod
+    def _tokens_from_response(response, skip_error: bool) -> Optional[TokensDict]:
         if response.status_code != 200 and not skip_error:
             raise Exception(response.json()["hint"])
         if response.status_code != 200 and skip_error:
@@ -78,18 +69,110 @@ class AmoCRMAuth(BaseAuth):
 
         return response.json()
 
-    def _get_access_token(self) -> Optional[str]:
+    def _stored_access_token(self) -> str:
+        version = self._storage.get_version()
         access_token = self._storage.get_access_token()
         if not access_token:
             raise EnvironmentError("You need to init tokens with code by 'init' method")
-        if self._is_expire(access_token):
-            access_token = self._update_tokens()
-
+        self._cache_token(access_token, version)
         return access_token
 
+    def _cache_token(self, access_token: str, version: Any = None) -> None:
+        self._cached_token = access_token
+        self._cached_exp = self._token_exp(access_token)
+        self._cached_version = version
+
+    def _save_tokens(self, tokens: TokensDict) -> None:
+        self._storage.save_tokens(tokens["access_token"], tokens["refresh_token"])
+        self._cache_token(tokens["access_token"], self._storage.get_version())
+
+    def _cached_access_token(self) -> Optional[str]:
+        """Cached token if it is fresh and nobody rotated it in the storage."""
+        if self._cached_token is None or self._is_cached_expiring():
+            return None
+        if self._storage.get_version() != self._cached_version:
+            return None
+        return self._cached_token
+
+    def _is_cached_expiring(self) -> bool:
+        return time() >= self._cached_exp - self._refresh_margin
+
     @staticmethod
-    def _is_expire(access_token: str) -> bool:
+    def _token_exp(access_token: str) -> float:
         token_data = jwt.decode(access_token, options={"verify_signature": False})
-        exp = datetime.utcfromtimestamp(token_data["exp"])
-        now = datetime.utcnow()
-        return now >= exp
+        return float(token_data["exp"])
+
+
+class AmoCRMAuth(OAuthTokensMixin, BaseAuth):
+    def __init__(
+        self,
+        subdomain: str,
+        client_id: str,
+        client_secret: str,
+        redirect_url: str,
+        storage: Optional[BaseTokenStorage] = None,
+        refresh_margin: float = 60,
+        **kwargs: Any,
+    ) -> None:
+        self._init_oauth(
+            client_id, client_secret, redirect_url, storage, refresh_margin
+        )
+        self._refresh_lock = threading.Lock()
+        super().__init__(subdomain, **kwargs)
+
+    def _auth(self, r):
+        r.headers["Authorization"] = f"Bearer {self._get_access_token()}"
+        return r
+
+    def init(self, code: str, skip_error: bool = False):
+        with self._refresh_lock, self._storage.lock():
+            data = self._get_or_update_tokens(code=code, skip_error=skip_error)
+            if not data:
+                return
+            self._save_tokens(data)
+
+    def _update_tokens(self) -> str:
+        refresh_token = self._storage.get_refresh_token()
+
+        data = self._get_or_update_tokens(refresh_token=refresh_token)
+        if not data:
+            raise
+        self._save_tokens(data)
+        return data["access_token"]
+
+    def _get_or_update_tokens(
+        self,
+        refresh_token: Optional[str] = None,
+        code: Optional[str] = None,
+        skip_error: bool = False,
+    ) -> Optional[TokensDict]:
+        data = self._token_request_data(refresh_token=refresh_token, code=code)
+        response = self.session.request(
+            method="POST", url=self._token_url, json=data, timeout=self._request_timeout
+        )
+        return self._tokens_from_response(response, skip_error)
+
+    def _get_access_token(self) -> Optional[str]:
+        access_token = self._cached_access_token()
+        if access_token:
+            return access_token
+
+        access_token = self._stored_access_token()
+        if self._is_cached_expiring():
+            access_token = self._refresh_access_token()
+
+        return access_token
+
+    def _refresh_access_token(self) -> str:
+        # threads of this process wait for a single refresh ...
+        with self._refresh_lock:
+            access_token = self._cached_access_token()
+            if access_token:
+                return access_token
+
+            # ... and so do other processes sharing the storage
+            with self._storage.lock():
+                access_token = self._stored_access_token()
+                if not self._is_cached_expiring():
+                    return access_token
+                return self._update_tokens()
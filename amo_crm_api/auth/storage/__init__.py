@@ -1,2 +1,3 @@
 from .base import BaseTokenStorage
 from .file import FileTokenStorage
+from .redis import RedisTokenStorage
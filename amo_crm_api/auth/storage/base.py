@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from contextlib import nullcontext
+from typing import Any, ContextManager, Optional
 
 
 class BaseTokenStorage(ABC):
@@ -13,4 +14,20 @@ class BaseTokenStorage(ABC):
 
     @abstractmethod
     def save_tokens(self, access_token: str, refresh_token: str):
+        """Called by the auth while it holds `lock()`."""
         raise NotImplementedError
+
+    def get_version(self) -> Optional[Any]:
+        """
+        Cheap marker that changes whenever the stored tokens change,
+        None when the storage can't tell.
+        """
+        return None
+
+    def lock(self) -> ContextManager:
+        """
+        Exclusive lock held while tokens are refreshed, so only one of the
+        clients sharing this storage spends the refresh token. The async
+        auth may release it from another thread than the one it acquired it.
+        """
+        return nullcontext()
@@ -1,45 +1,195 @@
 import json
 import os
-from typing import Optional
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 from .base import BaseTokenStorage
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+    import msvcrt
+
+
+def atomic_write(path: str, content: str) -> None:
+    """
+    Write a temporary file next to `path` and rename it over, readers see
+    either the old or the new file, never a partial one.
+    """
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as _file:
+            _file.write(content)
+            _file.flush()
+            os.fsync(_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class FileLock:
+    """
+    Exclusive, non-reentrant lock on `path`. Every acquisition opens its own
+    file handle, so it excludes other threads as well as other processes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._file: Any = None
+
+    def __enter__(self) -> "FileLock":
+        lock_file = open(self._path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ~10 seconds
+                        continue
+        except BaseException:
+            lock_file.close()
+            raise
+        self._file = lock_file
+        return self
+
+    def __exit__(self, *args) -> None:
+        lock_file, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            lock_file.close()
+
 
 class FileTokenStorage(BaseTokenStorage):
+    """
+    Both tokens live in a single `tokens/tokens.json`, replaced atomically on
+    every save, so readers never see a partial file or a mismatched pair.
+    The parsed content is cached until `stat` shows the file was replaced.
+    """
+
     def __init__(self, directory_path=os.getcwd()):
         dir_path = os.path.join(directory_path, "tokens")
 
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
 
-        self.access_token_path = os.path.join(
-            directory_path, "tokens/access_token.json"
-        )
-        self.refresh_token_path = os.path.join(
-            directory_path, "tokens/refresh_token.json"
+        self.tokens_path = os.path.join(dir_path, "tokens.json")
+        self.lock_path = os.path.join(dir_path, ".lock")
+        # layout used by earlier versions, migrated on first use
+        self.access_token_path = os.path.join(dir_path, "access_token.json")
+        self.refresh_token_path = os.path.join(dir_path, "refresh_token.json")
+
+        self._cache_lock = threading.Lock()
+        self._cached_stat: Optional[Tuple[int, int, int]] = None
+        self._cached_data: Dict[str, Any] = {}
+
+        if not os.path.exists(self.tokens_path) and os.path.exists(
+            self.refresh_token_path
+        ):
+            with self.lock():
+                self._migrate()
+
+    def _migrate(self) -> None:
+        if os.path.exists(self.tokens_path):
+            return
+        access_token = self._read_legacy(self.access_token_path, "access_token")
+        refresh_token = self._read_legacy(self.refresh_token_path, "refresh_token")
+        if not refresh_token:
+            return
+        self._write_file(
+            self.tokens_path,
+            json.dumps(
+                {
+                    "version": 1,
+                    "access_token": access_token,
+                    "refresh_token": refresh_token,
+                }
+            ),
         )
+        for path in (self.access_token_path, self.refresh_token_path):
+            if os.path.exists(path):
+                os.remove(path)
 
     @staticmethod
-    def _read_file(path):
+    def _read_legacy(path: str, key: str) -> Optional[str]:
         try:
             with open(path, "r", encoding="utf-8") as _file:
-                return _file.read().strip()
+                return json.load(_file).get(key)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(path)
         except FileNotFoundError:
             return None
+        # every save replaces the file, so the inode changes even when
+        # mtime resolution is too coarse to tell two writes apart
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _write_file(path: str, content: str) -> None:
+        atomic_write(path, content)
+
+    def _load(self) -> Dict[str, Any]:
+        signature = self._stat(self.tokens_path)
+        with self._cache_lock:
+            if signature is not None and signature == self._cached_stat:
+                return self._cached_data
+        if signature is None:
+            return {}
+
+        try:
+            with open(self.tokens_path, "r", encoding="utf-8") as _file:
+                # stat the open file, it may have been replaced since
+                st = os.fstat(_file.fileno())
+                data = json.load(_file)
+        except FileNotFoundError:
+            return {}
+
+        with self._cache_lock:
+            self._cached_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+            self._cached_data = data
+        return data
 
     def get_access_token(self) -> Optional[str]:
-        with open(file=self.access_token_path, mode="r", encoding="utf-8") as file:
-            return json.load(file)["access_token"]
+        return self._load().get("access_token")
 
     def get_refresh_token(self) -> Optional[str]:
-        with open(file=self.refresh_token_path, mode="r", encoding="utf-8") as file:
-            return json.load(file)["refresh_token"]
+        return self._load().get("refresh_token")
 
     def save_tokens(self, access_token: str, refresh_token: str):
-        with open(self.access_token_path, "w", encoding="utf-8") as _file:
-            data = {"access_token": access_token}
-            _file.write(json.dumps(data))
+        data = {
+            "version": self._load().get("version", 0) + 1,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+        }
+        self._write_file(self.tokens_path, json.dumps(data))
+
+    def get_version(self) -> Optional[Any]:
+        return self._stat(self.tokens_path)
 
-        with open(self.refresh_token_path, "w", encoding="utf-8") as _file:
-            data = {"refresh_token": refresh_token}
-            _file.write(json.dumps(data))
+    def lock(self) -> FileLock:
+        return FileLock(self.lock_path)
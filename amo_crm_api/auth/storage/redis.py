@@ -0,0 +1,121 @@
+import threading
+from time import time
+from typing import TYPE_CHECKING, Any, Optional
+
+import jwt
+
+from .base import BaseTokenStorage
+
+if TYPE_CHECKING:
+    from redis import Redis
+    from redis.lock import Lock
+
+
+class RedisTokenStorage(BaseTokenStorage):
+    """
+    Keeps both tokens in one redis hash, so every node sees the same pair.
+    With `subscribe=True` nodes are notified about refreshes over pub/sub and
+    `get_version` answers without a round trip to redis.
+    """
+
+    def __init__(
+        self,
+        client: "Redis",
+        key: str = "amo_crm_api:tokens",
+        refresh_token_ttl: int = 90 * 24 * 60 * 60,
+        lock_timeout: float = 60,
+        lock_blocking_timeout: Optional[float] = None,
+        subscribe: bool = True,
+    ) -> None:
+        self._client = client
+        self.key = key
+        self.channel = f"{key}:updates"
+        self.lock_key = f"{key}:lock"
+        self._refresh_token_ttl = refresh_token_ttl
+        self._lock_timeout = lock_timeout
+        self._lock_blocking_timeout = lock_blocking_timeout
+        self._version: Optional[int] = None
+        self._version_lock = threading.Lock()
+        self._pubsub_thread: Any = None
+
+        if subscribe:
+            self._subscribe()
+
+    def _subscribe(self) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: self._on_update})
+        self._pubsub_thread = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=self._on_pubsub_error
+        )
+        # read after subscribing, so no update can slip in between
+        self._set_version(self._client.hget(self.key, "version"))
+
+    def _on_update(self, message: dict) -> None:
+        self._set_version(message["data"])
+
+    def _on_pubsub_error(self, error: Exception, pubsub: Any, thread: Any) -> None:
+        # updates may be lost while disconnected, fall back to expiry checks
+        with self._version_lock:
+            self._version = None
+        pubsub.close()
+        thread.stop()
+        self._pubsub_thread = None
+
+    def _set_version(self, value: Any) -> None:
+        version = int(value) if value is not None else 0
+        with self._version_lock:
+            if self._version is None or version > self._version:
+                self._version = version
+
+    def close(self) -> None:
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+
+    def _get(self, field: str) -> Optional[str]:
+        value = self._client.hget(self.key, field)
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    def get_access_token(self) -> Optional[str]:
+        return self._get("access_token")
+
+    def get_refresh_token(self) -> Optional[str]:
+        return self._get("refresh_token")
+
+    def save_tokens(self, access_token: str, refresh_token: str):
+        token_data = jwt.decode(access_token, options={"verify_signature": False})
+        access_exp = int(token_data.get("exp", time()))
+
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.hset(
+            self.key,
+            mapping={
+                "access_token": access_token,
+                "refresh_token": refresh_token,
+                "access_exp": access_exp,
+            },
+        )
+        pipeline.hincrby(self.key, "version", 1)
+        # refresh token outlives the access token it was issued with
+        pipeline.expireat(self.key, access_exp + self._refresh_token_ttl)
+        _, version, _ = pipeline.execute()
+
+        self._client.publish(self.channel, version)
+        self._set_version(version)
+
+    def get_version(self) -> Optional[Any]:
+        if self._pubsub_thread is None:
+            return None
+        return self._version
+
+    def lock(self) -> "Lock":
+        # the async client acquires it in a worker thread and releases it in
+        # the loop thread, so the token can't be thread local
+        return self._client.lock(
+            self.lock_key,
+            timeout=self._lock_timeout,
+            blocking_timeout=self._lock_blocking_timeout,
+            thread_local=False,
+        )
@@ -1,10 +1,12 @@
+from typing import Any
+
 from .base import BaseAuth
 
 
 class AmoCRMTokenAuth(BaseAuth):
-    def __init__(self, subdomain: str, token: str) -> None:
+    def __init__(self, subdomain: str, token: str, **kwargs: Any) -> None:
         self._token = token
-        super().__init__(subdomain)
+        super().__init__(subdomain, **kwargs)
 
     def _auth(self, r):
         r.headers["Authorization"] = f"Bearer {self._token}"
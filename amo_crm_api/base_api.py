@@ -0,0 +1,395 @@
+from datetime import datetime
+from functools import cached_property, partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+)
+
+import pydantic
+from pydantic import BaseModel
+from pydantic_core import from_json
+
+from .auth import AsyncBaseAuth, BaseAuth
+from .cache import ResponseCache
+from .filters import Filter
+from .schemas import (
+    BatchItemResultSchema,
+    ComplexCreateResponseSchema,
+    ComplexLeadSchema,
+    ContactSchema,
+    CreateResponseSchema,
+    CustomFieldSchema,
+    LeadLossReasonSchema,
+    LeadSchema,
+    LinkSchema,
+    PipelineSchema,
+    StatusSchema,
+    TagSchema,
+    UpdateResponseSchema,
+    UserSchema,
+)
+from .schemas.base_model import API_CONTEXT, BaseModelForFieldsSchema
+from .schemas.raw import LazyModel, construct_model
+from .schemas.registry import list_schema, type_adapter, warm_up
+from .schemas.errors import Model as ValidationErrorsSchema
+from .store import CONTACTS, LEADS, EntityStore
+
+LeadType = TypeVar("LeadType", bound=LeadSchema)
+ContactType = TypeVar("ContactType", bound=ContactSchema)
+# entities that have custom fields
+EntityType = Literal["leads", "contacts", "companies"]
+# what list methods yield: validated models, the raw dicts, models validated
+# on first attribute access or models constructed without validation
+ListMode = Literal["model", "dict", "lazy", "trusted"]
+
+# maximum number of entities amoCRM accepts in one POST/PATCH
+BATCH_SIZE = 250
+# maximum number of leads accepted by /leads/complex
+COMPLEX_BATCH_SIZE = 50
+# bytes read at a time from streamed list pages
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# validators used by every client, built on construction with warm_up=True
+_LIST_TYPES = (
+    LinkSchema,
+    PipelineSchema,
+    StatusSchema,
+    CustomFieldSchema,
+    UserSchema,
+    LeadLossReasonSchema,
+    TagSchema,
+    CreateResponseSchema,
+    UpdateResponseSchema,
+)
+_ADAPTER_TYPES = (List[ComplexCreateResponseSchema],)
+# list endpoints whose pages are mirrored into the store
+_STORED_PATHS = {"/leads": LEADS, "/contacts": CONTACTS}
+
+
+class BaseAmoCRMApi(Generic[LeadType, ContactType]):
+    """Transport independent part of the sync and async clients."""
+
+    _auth: Union[BaseAuth, AsyncBaseAuth]
+    _warm_up: bool = False
+    _store: Optional[EntityStore] = None
+    _cache: Optional[ResponseCache] = None
+
+    def _warm_up_validators(self) -> None:
+        self._warm_up = True
+        warm_up(_LIST_TYPES, _ADAPTER_TYPES)
+
+    @staticmethod
+    def _filters_to_params(filters: List[Filter]) -> Dict[str, Any]:
+        params = dict()
+        for filter_obj in filters:
+            params.update(filter_obj._as_params())
+        return params
+
+    @cached_property
+    def _lead_model(self) -> type[LeadType]:
+        return self._resolve_model(LeadSchema)  # type: ignore
+
+    @cached_property
+    def _contact_model(self) -> Type[ContactType]:
+        return self._resolve_model(ContactSchema)  # type: ignore
+
+    def _resolve_model(self, base_type: type) -> type:
+        for arg in get_args(self.__orig_class__):
+            if issubclass(arg, base_type):
+                return arg
+        return base_type
+
+    @property
+    def __orig_class__(self) -> Any:
+        try:
+            return self.__dict__["__orig_class__"]
+        except KeyError:
+            raise AttributeError("__orig_class__") from None
+
+    @__orig_class__.setter
+    def __orig_class__(self, value: Any) -> None:
+        # typing assigns the parametrized alias right after __init__,
+        # so the lead/contact validators can only be warmed up here
+        self.__dict__["__orig_class__"] = value
+        if self._warm_up:
+            warm_up((self._lead_model, self._contact_model))
+
+    @staticmethod
+    def _parse_list(object_type: Any, content: bytes) -> List[Any]:
+        return (
+            list_schema(object_type)
+            .model_validate_json(content, context=API_CONTEXT)
+            .embedded.objects
+        )
+
+    def _local_object(self, kind: str, object_type: Any, entity_id: int) -> Any:
+        """Entity from the cache or the store, None when it has to be fetched."""
+        if self._cache is not None:
+            data = self._cache.get(kind, entity_id)
+            if data is not None:
+                return object_type.model_validate_json(data, context=API_CONTEXT)
+        if self._store is not None and kind in _STORED_PATHS.values():
+            stored = self._store.get(kind, entity_id)
+            if stored is not None:
+                return object_type.model_validate_json(stored, context=API_CONTEXT)
+        return None
+
+    def _keep_object(self, kind: str, entity_id: int, content: bytes) -> None:
+        if self._cache is not None:
+            self._cache.set(kind, entity_id, content)
+        if self._store is not None and kind in _STORED_PATHS.values():
+            self._store.upsert(kind, [from_json(content)])
+
+    def _store_page(self, path: str, content: bytes) -> None:
+        entity = _STORED_PATHS.get(path)
+        if self._store is not None and entity is not None:
+            self._store.upsert(entity, from_json(content)["_embedded"][entity])
+
+    def _page_items(self, path: str, content: bytes) -> List[Dict[str, Any]]:
+        """Raw items of a page, mirrored into the store first."""
+        entity = path.rsplit("/", 1)[-1]
+        items = from_json(content).get("_embedded", {}).get(entity, [])
+        kind = _STORED_PATHS.get(path)
+        if self._store is not None and kind is not None:
+            self._store.upsert(kind, items)
+        return items
+
+    @staticmethod
+    def _item_converter(
+        object_type: Any, mode: ListMode
+    ) -> Optional[Callable[[Dict[str, Any]], Any]]:
+        """Turns a raw list item into what `mode` yields, None for "dict"."""
+        if mode == "model":
+            return partial(object_type.model_validate, context=API_CONTEXT)
+        if mode == "lazy":
+            return partial(LazyModel, object_type=object_type)
+        if mode == "trusted":
+            return partial(construct_model, object_type)
+        if mode == "dict":
+            return None
+        raise ValueError(f"unknown list mode {mode!r}")
+
+    def _stream_target(self, path: str) -> Tuple[Tuple[str, str], Optional[str]]:
+        """Path of the items in a page of `path`, and the store kind they are
+        mirrored into, if any."""
+        kind = _STORED_PATHS.get(path) if self._store is not None else None
+        return ("_embedded", path.rsplit("/", 1)[-1]), kind
+
+    def _invalidate(self, kind: str, ids: Iterable[Optional[int]]) -> None:
+        known_ids: List[int] = [entity_id for entity_id in ids if entity_id is not None]
+        if self._cache is not None:
+            for entity_id in known_ids:
+                self._cache.invalidate(kind, entity_id)
+        if self._store is not None:
+            self._store.delete(kind, known_ids)
+
+    def _query_store(self, entity: str, object_type: Any, criteria: dict) -> List[Any]:
+        if self._store is None:
+            raise ValueError("the client has no store")
+        return [
+            object_type.model_validate_json(data, context=API_CONTEXT)
+            for data in self._store.query(entity, **criteria)
+        ]
+
+    def query_leads(self, **criteria: Any) -> List[LeadType]:
+        """Leads from the local store, see `EntityStore.query` for criteria."""
+        return self._query_store(LEADS, self._lead_model, criteria)
+
+    def query_contacts(self, **criteria: Any) -> List[ContactType]:
+        """Contacts from the local store, see `EntityStore.query` for criteria."""
+        return self._query_store(CONTACTS, self._contact_model, criteria)
+
+    def _parse_response(self, object_type: Any, response: Any) -> List[Any]:
+        revalidator = getattr(self._auth, "revalidator", None)
+        if revalidator is None:
+            return self._parse_list(object_type, response.content)
+        return revalidator.parse(
+            response, object_type, partial(self._parse_list, object_type)
+        )
+
+    @staticmethod
+    def _create_payload(obj: BaseModel) -> dict:
+        return obj.model_dump(exclude_unset=True)
+
+    @staticmethod
+    def _update_payload(obj: BaseModel) -> dict:
+        if isinstance(obj, BaseModelForFieldsSchema):
+            return obj.model_dump_changes(by_alias=True)
+        return obj.model_dump(exclude_unset=True, by_alias=True)
+
+    @staticmethod
+    def _unchanged(obj: Any) -> bool:
+        return isinstance(obj, BaseModelForFieldsSchema) and not obj.model_has_changes()
+
+    @staticmethod
+    def _unchanged_response(obj: Any) -> UpdateResponseSchema:
+        # nothing was sent, the object is what amoCRM already has
+        return UpdateResponseSchema(id=obj.id, updated_at=obj.updated_at)
+
+    @staticmethod
+    def _mark_saved(
+        obj: Any, updated_at: Optional[datetime] = None, state: Any = None
+    ) -> None:
+        """
+        Take a new snapshot of a saved object, with amoCRM's `updated_at`.
+        `state` is the snapshot state of what was sent, if it was taken earlier.
+        """
+        if not isinstance(obj, BaseModelForFieldsSchema):
+            return
+        if updated_at is not None and "updated_at" in obj.model_fields:
+            obj.updated_at = updated_at  # type: ignore
+        obj.model_snapshot(state)
+
+    @classmethod
+    def _split_unchanged(
+        cls, objects: Iterable[Any]
+    ) -> Tuple[List[Tuple[int, Any]], List[BatchItemResultSchema]]:
+        """(index, object) pairs to send and results of those with no changes."""
+        changed = []
+        skipped = []
+        for index, obj in enumerate(objects):
+            if obj.id is None:
+                raise ValueError(f"item {index} has no id")
+            if cls._unchanged(obj):
+                skipped.append(
+                    BatchItemResultSchema(
+                        index=index, item=obj, id=obj.id, updated_at=obj.updated_at
+                    )
+                )
+            else:
+                changed.append((index, obj))
+        return changed, skipped
+
+    @classmethod
+    def _merge_skipped(
+        cls,
+        changed: List[Tuple[int, Any]],
+        results: List[BatchItemResultSchema],
+        skipped: List[BatchItemResultSchema],
+    ) -> List[BatchItemResultSchema]:
+        for result in results:
+            if result.ok:
+                cls._mark_saved(result.item, result.updated_at)
+            result.index = changed[result.index][0]
+        return sorted([*results, *skipped], key=lambda result: result.index)
+
+    @classmethod
+    def _complex_payload(
+        cls,
+        lead: BaseModel,
+        contacts: Iterable[BaseModel],
+        company: Optional[BaseModel] = None,
+    ) -> dict:
+        lead_data = cls._create_payload(lead)
+        lead_data["_embedded"] = {}
+        lead_data["_embedded"]["contacts"] = [
+            cls._create_payload(contact) for contact in contacts
+        ]
+        if company is not None:
+            lead_data["_embedded"]["companies"] = [cls._create_payload(company)]
+        return lead_data
+
+    @classmethod
+    def _complex_lead_payload(cls, item: ComplexLeadSchema) -> dict:
+        return cls._complex_payload(item.lead, item.contacts, item.company)
+
+    @staticmethod
+    def _parse_created(content: bytes) -> List[Any]:
+        return BaseAmoCRMApi._parse_list(CreateResponseSchema, content)
+
+    @classmethod
+    def _created(cls, obj: Any, content: bytes) -> Any:
+        """`obj` with the id amoCRM gave it, everything it had is saved."""
+        obj.id = cls._parse_created(content)[0].id
+        cls._mark_saved(obj)
+        return obj
+
+    @staticmethod
+    def _parse_updated(content: bytes) -> List[Any]:
+        return BaseAmoCRMApi._parse_list(UpdateResponseSchema, content)
+
+    @staticmethod
+    def _parse_complex_created(content: bytes) -> List[Any]:
+        return type_adapter(List[ComplexCreateResponseSchema]).validate_json(content)
+
+    @staticmethod
+    def _batch_payloads(
+        objects: Iterable[Any],
+        payload_fn: Callable[[Any], dict],
+        require_id: bool = False,
+        batch_size: int = BATCH_SIZE,
+    ) -> Tuple[List[Any], List[Tuple[int, List[dict]]]]:
+        """Return input items and (offset, payloads) chunks of `batch_size`."""
+        items = list(objects)
+        payloads = []
+        for index, obj in enumerate(items):
+            if require_id and obj.id is None:
+                raise ValueError(f"item {index} has no id")
+            data = payload_fn(obj)
+            data["request_id"] = str(index)
+            payloads.append(data)
+
+        chunks = [
+            (offset, payloads[offset : offset + batch_size])
+            for offset in range(0, len(payloads), batch_size)
+        ]
+        return items, chunks
+
+    @staticmethod
+    def _batch_results(
+        items: List[Any],
+        offset: int,
+        size: int,
+        objects: List[Any],
+    ) -> List[BatchItemResultSchema]:
+        results = {
+            index: BatchItemResultSchema(index=index, item=items[index])
+            for index in range(offset, offset + size)
+        }
+        for position, obj in enumerate(objects):
+            request_id = getattr(obj, "request_id", None)
+            if isinstance(request_id, list):
+                request_id = request_id[0] if request_id else None
+            if request_id and request_id.isdigit():
+                index = int(request_id)
+            else:
+                index = offset + position
+            result = results[index]
+            result.id = obj.id
+            result.updated_at = getattr(obj, "updated_at", None)
+            result.response = obj
+        return list(results.values())
+
+    @staticmethod
+    def _batch_errors(
+        items: List[Any], offset: int, size: int, error_data: Any
+    ) -> List[BatchItemResultSchema]:
+        results = {
+            index: BatchItemResultSchema(index=index, item=items[index], rejected=True)
+            for index in range(offset, offset + size)
+        }
+        try:
+            validation_errors = ValidationErrorsSchema.model_validate(
+                error_data
+            ).validation_errors
+        except pydantic.ValidationError:
+            validation_errors = []
+
+        for validation_error in validation_errors:
+            request_id = validation_error.request_id
+            index = int(request_id) if request_id.isdigit() else -1
+            if index in results:
+                results[index].errors = validation_error.errors
+                results[index].rejected = False
+        return list(results.values())
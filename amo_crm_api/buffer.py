@@ -0,0 +1,397 @@
+import asyncio
+import atexit
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .base_api import BATCH_SIZE, BaseAmoCRMApi
+from .schemas import BatchItemResultSchema
+from .schemas.base_model import BaseModelForFieldsSchema
+from .store import CONTACTS, LEADS
+
+if TYPE_CHECKING:
+    from .amo_crm import AmoCRMApi
+    from .async_amo_crm import AsyncAmoCRMApi
+
+CUSTOM_FIELDS = "custom_fields_values"
+
+
+def merge_payloads(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Update payload with the changes of both, `new` wins on conflicts."""
+    merged = {**old, **new}
+    if old.get(CUSTOM_FIELDS) and new.get(CUSTOM_FIELDS):
+        fields: Dict[Any, Dict[str, Any]] = {}
+        for field in old[CUSTOM_FIELDS] + new[CUSTOM_FIELDS]:
+            fields[(field.get("field_id"), field.get("field_code"))] = field
+        merged[CUSTOM_FIELDS] = list(fields.values())
+    return merged
+
+
+class _Pending:
+    __slots__ = ("item", "payload", "futures", "queued")
+
+    def __init__(self, item: Any, payload: Dict[str, Any]) -> None:
+        self.item = item
+        self.payload = payload
+        self.futures: List[Any] = []
+        # every queued object with its snapshot state at queuing time
+        self.queued: List[Tuple[Any, Any]] = []
+
+
+class BaseUpdateBuffer:
+    """
+    Write-behind buffer in front of lead and contact updates.
+
+    Changes queued for the same entity are merged into one payload, and the
+    queue is sent as batched PATCH requests once `max_items` entities of a
+    kind are waiting, the oldest change is `max_delay` seconds old or `flush`
+    is called. With `max_pending` entities waiting, queuing another one waits
+    for a flush. Every queued change gets a future resolved with the
+    `BatchItemResultSchema` of its entity.
+    """
+
+    def __init__(
+        self,
+        max_items: int = BATCH_SIZE,
+        max_delay: float = 1.0,
+        max_pending: int = 4 * BATCH_SIZE,
+        max_workers: int = 1,
+    ) -> None:
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+        self._pending: Dict[str, Dict[int, _Pending]] = {LEADS: {}, CONTACTS: {}}
+        self._oldest: Optional[float] = None
+        self._closed = False
+        self._counter: Counter = Counter()
+
+    @property
+    def pending(self) -> int:
+        """Entities waiting to be sent."""
+        return sum(len(entries) for entries in self._pending.values())
+
+    def _payload(self, obj: Any) -> Optional[Dict[str, Any]]:
+        """Payload to queue, None when the object has nothing to send."""
+        if obj.id is None:
+            raise ValueError("the object has no id")
+        if BaseAmoCRMApi._unchanged(obj):
+            self._counter["skipped"] += 1
+            return None
+        return BaseAmoCRMApi._update_payload(obj)
+
+    @staticmethod
+    def _queued_state(obj: Any) -> Any:
+        # changes made after queuing are not sent, so they must not end up
+        # in the snapshot taken once the flush succeeded
+        if isinstance(obj, BaseModelForFieldsSchema):
+            return obj._snapshot_state()
+        return None
+
+    @staticmethod
+    def _skipped_result(obj: Any) -> BatchItemResultSchema:
+        return BatchItemResultSchema(
+            index=0, item=obj, id=obj.id, updated_at=obj.updated_at
+        )
+
+    def _must_wait(self, kind: str, entity_id: int) -> bool:
+        # merging into a queued entity never waits
+        return (
+            not self._closed
+            and self.pending >= self.max_pending
+            and entity_id not in self._pending[kind]
+        )
+
+    def _queue(
+        self, kind: str, obj: Any, payload: Dict[str, Any], state: Any, future: Any
+    ) -> bool:
+        """Queue a change, True when the flusher has to be woken up."""
+        if self._closed:
+            raise RuntimeError("the buffer is closed")
+        entries = self._pending[kind]
+        entry = entries.get(obj.id)
+        first = self._oldest is None
+        if entry is None:
+            entry = entries[obj.id] = _Pending(obj, payload)
+            if first:
+                self._oldest = monotonic()
+        else:
+            entry.item = obj
+            entry.payload = merge_payloads(entry.payload, payload)
+            self._counter["coalesced"] += 1
+        entry.futures.append(future)
+        entry.queued.append((obj, state))
+        self._counter["queued"] += 1
+        # the flusher sleeps without a timeout while the buffer is empty
+        return first or self._due()
+
+    def _due(self) -> bool:
+        if self._oldest is None:
+            return False
+        return (
+            self._closed
+            or self.pending >= self.max_pending
+            or any(len(entries) >= self.max_items for entries in self._pending.values())
+            or monotonic() - self._oldest >= self.max_delay
+        )
+
+    def _wait_time(self) -> Optional[float]:
+        if self._oldest is None:
+            return None
+        return max(0.0, self._oldest + self.max_delay - monotonic())
+
+    def _take(self) -> Dict[str, List[_Pending]]:
+        taken = {
+            kind: list(entries.values())
+            for kind, entries in self._pending.items()
+            if entries
+        }
+        self._pending = {LEADS: {}, CONTACTS: {}}
+        self._oldest = None
+        return taken
+
+    def _resolve(
+        self, entries: List[_Pending], results: List[BatchItemResultSchema]
+    ) -> None:
+        self._counter["sent"] += len(entries)
+        self._counter["requests"] += -(-len(entries) // BATCH_SIZE)
+        for result in results:
+            entry = entries[result.index]
+            result.item = entry.item
+            if result.ok:
+                for obj, state in entry.queued:
+                    BaseAmoCRMApi._mark_saved(obj, result.updated_at, state)
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(result)
+
+    @staticmethod
+    def _fail(entries: List[_Pending], error: BaseException) -> None:
+        for entry in entries:
+            for future in entry.futures:
+                if not future.done():
+                    future.set_exception(error)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._counter)
+
+    def reset_stats(self) -> None:
+        self._counter.clear()
+
+
+class UpdateBuffer(BaseUpdateBuffer):
+    """`BaseUpdateBuffer` flushed by a daemon thread and at interpreter exit."""
+
+    def __init__(
+        self,
+        api: "AmoCRMApi",
+        max_items: int = BATCH_SIZE,
+        max_delay: float = 1.0,
+        max_pending: int = 4 * BATCH_SIZE,
+        max_workers: int = 1,
+    ) -> None:
+        super().__init__(max_items, max_delay, max_pending, max_workers)
+        self._api = api
+        self._lock = threading.Lock()
+        # wakes the flusher
+        self._wakeup = threading.Condition(self._lock)
+        # wakes callers waiting for room in the buffer
+        self._not_full = threading.Condition(self._lock)
+        # held while a batch is taken and sent, so changes of one entity
+        # can't overtake each other
+        self._send_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="amo-crm-update-buffer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def update_lead(self, lead: Any) -> "Future[BatchItemResultSchema]":
+        return self._add(LEADS, lead)
+
+    def update_contact(self, contact: Any) -> "Future[BatchItemResultSchema]":
+        return self._add(CONTACTS, contact)
+
+    def _add(self, kind: str, obj: Any) -> "Future[BatchItemResultSchema]":
+        future: "Future[BatchItemResultSchema]" = Future()
+        payload = self._payload(obj)
+        if payload is None:
+            future.set_result(self._skipped_result(obj))
+            return future
+        state = self._queued_state(obj)
+
+        with self._lock:
+            while self._must_wait(kind, obj.id):
+                self._counter["waits"] += 1
+                self._wakeup.notify()
+                self._not_full.wait()
+            if self._queue(kind, obj, payload, state, future):
+                self._wakeup.notify()
+        return future
+
+    def flush(self) -> None:
+        """Send everything queued so far and wait for the responses."""
+        with self._send_lock:
+            with self._lock:
+                taken = self._take()
+                self._not_full.notify_all()
+            for kind, entries in taken.items():
+                self._send(kind, entries)
+
+    def _send(self, kind: str, entries: List[_Pending]) -> None:
+        try:
+            results = self._api._send_batches(
+                method="PATCH",
+                path=f"/{kind}",
+                objects=[entry.payload for entry in entries],
+                payload_fn=dict,
+                parse_fn=self._api._parse_updated,
+                max_workers=self.max_workers,
+            )
+        except Exception as e:
+            self._fail(entries, e)
+            return
+        self._api._invalidate(kind, [entry.item.id for entry in entries])
+        self._resolve(entries, results)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._due():
+                    if self._closed:
+                        return
+                    self._wakeup.wait(self._wait_time())
+            self.flush()
+
+    def close(self) -> None:
+        """Flush what is queued and stop the thread."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+            self._not_full.notify_all()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class AsyncUpdateBuffer(BaseUpdateBuffer):
+    """`BaseUpdateBuffer` flushed by a background task, started on first use."""
+
+    def __init__(
+        self,
+        api: "AsyncAmoCRMApi",
+        max_items: int = BATCH_SIZE,
+        max_delay: float = 1.0,
+        max_pending: int = 4 * BATCH_SIZE,
+        max_workers: int = 1,
+    ) -> None:
+        super().__init__(max_items, max_delay, max_pending, max_workers)
+        self._api = api
+        self._task: Optional[asyncio.Task] = None
+        self._started = False
+
+    def _start(self) -> None:
+        # asyncio primitives are bound to the loop they are first used in
+        if not self._started:
+            self._lock = asyncio.Lock()
+            self._wakeup = asyncio.Condition(self._lock)
+            self._not_full = asyncio.Condition(self._lock)
+            self._send_lock = asyncio.Lock()
+            self._started = True
+        if self._task is None and not self._closed:
+            self._task = asyncio.create_task(self._run())
+
+    async def update_lead(self, lead: Any) -> "asyncio.Future[BatchItemResultSchema]":
+        return await self._add(LEADS, lead)
+
+    async def update_contact(
+        self, contact: Any
+    ) -> "asyncio.Future[BatchItemResultSchema]":
+        return await self._add(CONTACTS, contact)
+
+    async def _add(
+        self, kind: str, obj: Any
+    ) -> "asyncio.Future[BatchItemResultSchema]":
+        future: "asyncio.Future[BatchItemResultSchema]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        payload = self._payload(obj)
+        if payload is None:
+            future.set_result(self._skipped_result(obj))
+            return future
+        state = self._queued_state(obj)
+
+        self._start()
+        async with self._lock:
+            while self._must_wait(kind, obj.id):
+                self._counter["waits"] += 1
+                self._wakeup.notify()
+                await self._not_full.wait()
+            if self._queue(kind, obj, payload, state, future):
+                self._wakeup.notify()
+        return future
+
+    async def flush(self) -> None:
+        """Send everything queued so far and wait for the responses."""
+        self._start()
+        async with self._send_lock:
+            async with self._lock:
+                taken = self._take()
+                self._not_full.notify_all()
+            for kind, entries in taken.items():
+                await self._send(kind, entries)
+
+    async def _send(self, kind: str, entries: List[_Pending]) -> None:
+        try:
+            results = await self._api._send_batches(
+                method="PATCH",
+                path=f"/{kind}",
+                objects=[entry.payload for entry in entries],
+                payload_fn=dict,
+                parse_fn=self._api._parse_updated,
+                max_workers=self.max_workers,
+            )
+        except Exception as e:
+            self._fail(entries, e)
+            return
+        self._api._invalidate(kind, [entry.item.id for entry in entries])
+        self._resolve(entries, results)
+
+    async def _run(self) -> None:
+        while True:
+            async with self._lock:
+                while not self._due():
+                    if self._closed:
+                        return
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self._wait_time())
+                    except asyncio.TimeoutError:
+                        pass
+            await self.flush()
+
+    async def close(self) -> None:
+        """Flush what is queued and stop the task."""
+        self._closed = True
+        if not self._started:
+            return
+        async with self._lock:
+            self._wakeup.notify()
+            self._not_full.notify_all()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -0,0 +1,106 @@
+import threading
+from collections import Counter, OrderedDict
+from time import monotonic
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .store import CONTACTS, LEADS
+
+USERS = "users"
+PIPELINES = "pipelines"
+
+DEFAULT_TTLS = {LEADS: 30, CONTACTS: 30, USERS: 600, PIPELINES: 600}
+
+# rough per-entry cost of the key, tuple and dict slot on top of the payload
+_ENTRY_OVERHEAD = 200
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU cache of raw response bodies.
+
+    Entries are keyed by (kind, id) and expire after the TTL of their kind.
+    Once the payloads exceed `max_bytes` the least recently used entries are
+    evicted. Bodies are kept as bytes, so every hit is validated into a new
+    model instance and callers never share a mutable object.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 30,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, bytes]]" = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._counter: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self._counter[f"miss:{kind}"] += 1
+                return None
+            expires_at, data = entry
+            if monotonic() >= expires_at:
+                self._remove((kind, key))
+                self._counter[f"expired:{kind}"] += 1
+                self._counter[f"miss:{kind}"] += 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self._counter[f"hit:{kind}"] += 1
+            return data
+
+    def set(self, kind: str, key: Hashable, data: bytes) -> None:
+        size = len(data) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        expires_at = monotonic() + self.ttls.get(kind, self.default_ttl)
+        with self._lock:
+            self._remove((kind, key))
+            self._entries[(kind, key)] = (expires_at, data)
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._counter[f"eviction:{oldest_key[0]}"] += 1
+
+    def invalidate(self, kind: str, key: Hashable) -> None:
+        with self._lock:
+            if self._remove((kind, key)):
+                self._counter[f"invalidation:{kind}"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, entry_key: Tuple[str, Hashable]) -> bool:
+        entry = self._entries.pop(entry_key, None)
+        if entry is None:
+            return False
+        self._size -= len(entry[1]) + _ENTRY_OVERHEAD
+        return True
+
+    @property
+    def size(self) -> int:
+        """Approximate bytes held."""
+        with self._lock:
+            return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counter)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counter.clear()
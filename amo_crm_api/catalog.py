@@ -0,0 +1,288 @@
+import asyncio
+import os
+import threading
+from time import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .auth.storage.file import atomic_write
+from .base_api import EntityType
+from .schemas import (
+    CustomFieldSchema,
+    LeadLossReasonSchema,
+    PipelineSchema,
+    StatusSchema,
+    TagSchema,
+    UserSchema,
+)
+from .schemas.custom_fields import EnumSchema
+
+if TYPE_CHECKING:
+    from .amo_crm import AmoCRMApi
+    from .async_amo_crm import AsyncAmoCRMApi
+
+
+class CatalogSnapshot(BaseModel):
+    pipelines: List[PipelineSchema] = []
+    lead_custom_fields: List[CustomFieldSchema] = []
+    contact_custom_fields: List[CustomFieldSchema] = []
+    users: List[UserSchema] = []
+    loss_reasons: List[LeadLossReasonSchema] = []
+    tags: List[TagSchema] = []
+    loaded_at: float = 0
+
+
+class CatalogIndex:
+    """Lookups over one snapshot, built once and swapped as a whole on refresh."""
+
+    def __init__(self, snapshot: CatalogSnapshot) -> None:
+        self.snapshot = snapshot
+        self.pipelines = {pipeline.id: pipeline for pipeline in snapshot.pipelines}
+        self.statuses: Dict[Tuple[int, int], StatusSchema] = {
+            (pipeline.id, status.id): status
+            for pipeline in snapshot.pipelines
+            for status in pipeline.statuses
+        }
+        self.custom_fields: Dict[Tuple[str, int], CustomFieldSchema] = {}
+        self.enums: Dict[int, EnumSchema] = {}
+        for entity, fields in (
+            ("leads", snapshot.lead_custom_fields),
+            ("contacts", snapshot.contact_custom_fields),
+        ):
+            for field in fields:
+                self.custom_fields[(entity, field.id)] = field
+                for enum in field.enums or ():
+                    self.enums[enum.id] = enum
+        self.users = {user.id: user for user in snapshot.users}
+        self.loss_reasons = {reason.id: reason for reason in snapshot.loss_reasons}
+        self.tags = {tag.id: tag for tag in snapshot.tags}
+
+
+class BaseAccountCatalog:
+    """
+    Account reference data (pipelines and statuses, custom fields, users,
+    loss reasons and tags) loaded once and served from memory.
+
+    With `path` every loaded snapshot is written to disk, so the next start
+    can serve it right away and only refresh once it is older than
+    `refresh_interval` seconds.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, refresh_interval: float = 3600
+    ) -> None:
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.last_error: Optional[BaseException] = None
+        self._index = CatalogIndex(CatalogSnapshot())
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._index.snapshot
+
+    @property
+    def loaded(self) -> bool:
+        return self._index.snapshot.loaded_at > 0
+
+    @property
+    def age(self) -> float:
+        """Seconds since the data was fetched from the API."""
+        return time() - self._index.snapshot.loaded_at
+
+    def _set_snapshot(self, snapshot: CatalogSnapshot) -> None:
+        self._index = CatalogIndex(snapshot)
+        if self.path:
+            atomic_write(self.path, snapshot.model_dump_json())
+
+    def load_from_disk(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as _file:
+            self._index = CatalogIndex(
+                CatalogSnapshot.model_validate_json(_file.read())
+            )
+        return True
+
+    def _needs_refresh(self) -> bool:
+        return not self.loaded or self.age >= self.refresh_interval
+
+    def _next_refresh_in(self) -> float:
+        return max(0.0, self.refresh_interval - self.age)
+
+    def pipeline(self, pipeline_id: int) -> Optional[PipelineSchema]:
+        return self._index.pipelines.get(pipeline_id)
+
+    def status(self, pipeline_id: int, status_id: int) -> Optional[StatusSchema]:
+        return self._index.statuses.get((pipeline_id, status_id))
+
+    def custom_field(
+        self, field_id: int, entity: EntityType = "leads"
+    ) -> Optional[CustomFieldSchema]:
+        return self._index.custom_fields.get((entity, field_id))
+
+    def custom_fields(self, entity: EntityType = "leads") -> List[CustomFieldSchema]:
+        if entity == "contacts":
+            return self._index.snapshot.contact_custom_fields
+        return self._index.snapshot.lead_custom_fields
+
+    def enum(self, enum_id: int) -> Optional[EnumSchema]:
+        return self._index.enums.get(enum_id)
+
+    def user(self, user_id: int) -> Optional[UserSchema]:
+        return self._index.users.get(user_id)
+
+    def loss_reason(self, loss_reason_id: int) -> Optional[LeadLossReasonSchema]:
+        return self._index.loss_reasons.get(loss_reason_id)
+
+    def tag(self, tag_id: int) -> Optional[TagSchema]:
+        return self._index.tags.get(tag_id)
+
+
+class AccountCatalog(BaseAccountCatalog):
+    def __init__(
+        self,
+        api: "AmoCRMApi",
+        path: Optional[str] = None,
+        refresh_interval: float = 3600,
+    ) -> None:
+        super().__init__(path, refresh_interval)
+        self._api = api
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> CatalogSnapshot:
+        snapshot = CatalogSnapshot(
+            pipelines=self._api.get_pipeline_list(),
+            lead_custom_fields=list(self._api.get_custom_field_list("leads")),
+            contact_custom_fields=list(self._api.get_custom_field_list("contacts")),
+            users=list(self._api.get_users()),
+            loss_reasons=self._api.get_loss_reason_list(),
+            tags=list(self._api.get_lead_tags()),
+            loaded_at=time(),
+        )
+        self._set_snapshot(snapshot)
+        return snapshot
+
+    def load(self) -> None:
+        """Serve the snapshot from disk if it is fresh enough, fetch it otherwise."""
+        from_disk = self.load_from_disk()
+        if not self._needs_refresh():
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            # a stale snapshot is still better than none
+            if not from_disk:
+                raise
+            self.last_error = e
+
+    def start(self) -> None:
+        """Load the catalog and keep refreshing it in a daemon thread."""
+        if self._thread is not None:
+            return
+        self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="amo-crm-catalog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._next_refresh_in()):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                # retry after a short pause instead of spinning
+                self._stop.wait(min(60.0, self.refresh_interval))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+class AsyncAccountCatalog(BaseAccountCatalog):
+    def __init__(
+        self,
+        api: "AsyncAmoCRMApi",
+        path: Optional[str] = None,
+        refresh_interval: float = 3600,
+    ) -> None:
+        super().__init__(path, refresh_interval)
+        self._api = api
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> CatalogSnapshot:
+        snapshot = CatalogSnapshot(
+            pipelines=await self._api.get_pipeline_list(),
+            lead_custom_fields=[
+                field async for field in self._api.get_custom_field_list("leads")
+            ],
+            contact_custom_fields=[
+                field async for field in self._api.get_custom_field_list("contacts")
+            ],
+            users=[user async for user in self._api.get_users()],
+            loss_reasons=await self._api.get_loss_reason_list(),
+            tags=[tag async for tag in self._api.get_lead_tags()],
+            loaded_at=time(),
+        )
+        self._set_snapshot(snapshot)
+        return snapshot
+
+    async def load(self) -> None:
+        """Serve the snapshot from disk if it is fresh enough, fetch it otherwise."""
+        from_disk = self.load_from_disk()
+        if not self._needs_refresh():
+            return
+        try:
+            await self.refresh()
+        except Exception as e:
+            # a stale snapshot is still better than none
+            if not from_disk:
+                raise
+            self.last_error = e
+
+    async def start(self) -> None:
+        """Load the catalog and keep refreshing it in a background task."""
+        if self._task is not None:
+            return
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_refresh_in())
+            try:
+                await self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                # retry after a short pause instead of spinning
+                await asyncio.sleep(min(60.0, self.refresh_interval))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
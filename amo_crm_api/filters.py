@@ -1,4 +1,5 @@
 import datetime
+from typing import Optional
 
 
 class Filter:
@@ -43,16 +44,23 @@ class RangeFilter(Filter):
         return self
 
     def _as_params(self):
-        return {
-            "filter[{}][from]".format(self._name): self._value_from,
-            "filter[{}][to]".format(self._name): self._value_to,
-        }
+        # an open bound is left out
+        params = {}
+        if self._value_from is not None:
+            params["filter[{}][from]".format(self._name)] = self._value_from
+        if self._value_to is not None:
+            params["filter[{}][to]".format(self._name)] = self._value_to
+        return params
 
 
 class DateRangeFilter(RangeFilter):
-    def __call__(self, value_from: datetime.datetime, value_to: datetime.datetime):
-        self._value_from = int(value_from.timestamp())
-        self._value_to = int(value_to.timestamp())
+    def __call__(
+        self,
+        value_from: Optional[datetime.datetime],
+        value_to: Optional[datetime.datetime],
+    ):
+        self._value_from = int(value_from.timestamp()) if value_from else None
+        self._value_to = int(value_to.timestamp()) if value_to else None
         return self
 
 
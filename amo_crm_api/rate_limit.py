@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from time import monotonic, sleep
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Bursts of up to `capacity` requests pass
+    immediately, after that callers wait for tokens refilled at `rate` per second.
+    """
+
+    def __init__(self, rate: float = 7, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        if self.capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._tokens = self.capacity
+        self._updated_at = monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens and return how long the caller has to wait for them."""
+        if tokens > self.capacity:
+            raise ValueError("tokens can not exceed capacity")
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        delay = self._reserve(tokens)
+        if delay:
+            sleep(delay)
+        return delay
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    @property
+    def available(self) -> float:
+        """Current fill level, negative while waiters are queued."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    subdomain: str, rate: float = 7, capacity: Optional[float] = None
+) -> TokenBucket:
+    """Return the process-wide limiter shared by all clients of `subdomain`."""
+    with _limiters_lock:
+        limiter = _limiters.get(subdomain)
+        if limiter is None:
+            limiter = _limiters[subdomain] = TokenBucket(rate=rate, capacity=capacity)
+        return limiter
@@ -0,0 +1,160 @@
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Iterable, Optional
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# the request never reached the API, so it is safe to repeat for any method
+CONNECT = "connect"
+# amoCRM rejects the request before processing it
+RATE_LIMITED = "rate_limited"
+# the request may have been processed, repeat only idempotent methods
+READ = "read"
+CONNECTION = "connection"
+SERVER_ERROR = "server_error"
+
+_ALWAYS_SAFE = frozenset({CONNECT, RATE_LIMITED})
+
+
+class RetryStats:
+    """Thread-safe counters of every retry decision."""
+
+    def __init__(self) -> None:
+        self._counter: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, key: str) -> None:
+        with self._lock:
+            self._counter[key] += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counter)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counter.clear()
+
+
+class RetryBudget:
+    """
+    Limits retries to a share of the traffic: every request deposits `ratio`
+    tokens, every retry withdraws one. `min_retries` tokens are always available
+    so a quiet client can still retry.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10) -> None:
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self._max_tokens = min_retries + 100 * ratio
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        total: int = 5,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30,
+        jitter: bool = True,
+        status_forcelist: Iterable[int] = (429, 500, 502, 503, 504),
+        allowed_methods: Iterable[str] = IDEMPOTENT_METHODS,
+        method_total: Optional[Dict[str, int]] = None,
+        respect_retry_after: bool = True,
+        budget: Optional[RetryBudget] = None,
+    ) -> None:
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.status_forcelist: FrozenSet[int] = frozenset(status_forcelist)
+        self.allowed_methods: FrozenSet[str] = frozenset(
+            method.upper() for method in allowed_methods
+        )
+        self.method_total = {
+            method.upper(): value for method, value in (method_total or {}).items()
+        }
+        self.respect_retry_after = respect_retry_after
+        self.budget = budget if budget else RetryBudget()
+        self.stats = RetryStats()
+
+    def max_retries(self, method: str) -> int:
+        return self.method_total.get(method.upper(), self.total)
+
+    def status_reason(self, status_code: int) -> Optional[str]:
+        if status_code not in self.status_forcelist:
+            return None
+        return RATE_LIMITED if status_code == 429 else SERVER_ERROR
+
+    def on_request(self) -> None:
+        self.budget.deposit()
+
+    def next_delay(
+        self,
+        method: str,
+        attempt: int,
+        reason: str,
+        retry_after: Optional[str] = None,
+    ) -> Optional[float]:
+        """
+        Return how long to wait before the next attempt,
+        or None when the request must not be retried.
+        """
+        method = method.upper()
+        if reason not in _ALWAYS_SAFE and method not in self.allowed_methods:
+            self.stats.increment(f"giveup:not_idempotent:{reason}")
+            return None
+        if attempt >= self.max_retries(method):
+            self.stats.increment(f"giveup:exhausted:{reason}")
+            return None
+        if not self.budget.withdraw():
+            self.stats.increment(f"giveup:budget:{reason}")
+            return None
+
+        self.stats.increment(f"retry:{reason}")
+        delay = self._backoff(attempt)
+        if self.respect_retry_after and retry_after:
+            server_delay = self._parse_retry_after(retry_after)
+            if server_delay is not None:
+                delay = max(delay, min(server_delay, self.backoff_max))
+        return delay
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_factor * (2**attempt))
+        if self.jitter:
+            # "full jitter", spreads retries of concurrent clients
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def _parse_retry_after(value: str) -> Optional[float]:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,154 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# reference endpoints that change rarely but are re-read often
+DEFAULT_PATHS = (
+    "/leads/pipelines",
+    "/leads/custom_fields",
+    "/contacts/custom_fields",
+    "/users",
+    "/leads/loss_reasons",
+    "/leads/tags",
+)
+
+
+class _Entry:
+    __slots__ = ("etag", "last_modified", "digest", "content", "parsed")
+
+    def __init__(self) -> None:
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.digest: Optional[bytes] = None
+        self.content: bytes = b""
+        self.parsed: Dict[Any, List[Any]] = {}
+
+
+class Revalidator:
+    """
+    Remembers the last body of GET responses to `paths`.
+
+    Requests carry If-None-Match / If-Modified-Since when an earlier response
+    had ETag / Last-Modified, and a 304 is answered with the stored body.
+    Either way the body is hashed, and while the hash is unchanged the objects
+    parsed from it earlier are returned instead of parsing it again. Those
+    objects are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self, paths: Optional[Iterable[str]] = DEFAULT_PATHS, max_entries: int = 256
+    ) -> None:
+        self.paths = tuple(paths) if paths is not None else None
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._counter: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def key(self, method: str, path: str, params: Optional[dict]) -> Optional[Hashable]:
+        """Cache key of a request, None when it is not revalidated."""
+        if method != "GET":
+            return None
+        if self.paths is not None and not path.startswith(self.paths):
+            return None
+        items: Tuple[Tuple[str, str], ...] = tuple(
+            sorted((str(k), str(v)) for k, v in (params or {}).items())
+        )
+        return (path, items)
+
+    def request_headers(self, key: Hashable) -> Dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            self._counter["requests"] += 1
+            if entry is None:
+                return {}
+            headers = {}
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+            if headers:
+                self._counter["conditional"] += 1
+            return headers
+
+    def on_response(self, key: Hashable, response: Any) -> bool:
+        """
+        Record a response, turning a 304 into the stored 200. False for a 304
+        whose body was evicted since the request was made, it has to be
+        repeated without conditional headers.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if response.status_code == 304:
+                if entry is None:
+                    self._counter["evicted"] += 1
+                    return False
+                self._counter["not_modified"] += 1
+                response.status_code = 200
+                response._content = entry.content
+                response.content_digest = entry.digest
+                response.revalidation_key = key
+                self._entries.move_to_end(key)
+                return True
+            if response.status_code != 200:
+                return True
+
+        content = response.content
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            if entry.digest == digest:
+                self._counter["unchanged"] += 1
+            else:
+                self._counter["changed"] += 1
+                entry.digest = digest
+                entry.content = content
+                entry.parsed = {}
+            entry.etag = response.headers.get("ETag")
+            entry.last_modified = response.headers.get("Last-Modified")
+        response.content_digest = digest
+        response.revalidation_key = key
+        return True
+
+    def parse(
+        self, response: Any, object_type: Any, parse_fn: Callable[[bytes], List[Any]]
+    ) -> List[Any]:
+        """`parse_fn(response.content)`, reused while the body is unchanged."""
+        key = getattr(response, "revalidation_key", None)
+        digest = getattr(response, "content_digest", None)
+        if key is None:
+            return parse_fn(response.content)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                parsed = entry.parsed.get(object_type)
+                if parsed is not None:
+                    self._counter["parse_skipped"] += 1
+                    return list(parsed)
+
+        parsed = parse_fn(response.content)
+        with self._lock:
+            self._counter["parsed"] += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                entry.parsed[object_type] = parsed
+        return list(parsed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counter)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counter.clear()
@@ -1,5 +1,7 @@
+from .batch import BatchItemResultSchema
 from .common import (
     ComplexCreateResponseSchema,
+    CreateResponseSchema,
     CustomFieldsValueSchema,
     ListModelSchema,
     UpdateResponseSchema,
@@ -7,9 +9,16 @@ from .common import (
     ValueSchema,
     TagSchema
 )
+from .companies import CompanySchema
 from .contacts import ContactSchema
 from .custom_fields import CustomFieldSchema
-from .leads import LeadEmbeddedSchema, LeadSchema, LeadLossReasonSchema
+from .leads import (
+    ComplexLeadSchema,
+    LeadEmbeddedSchema,
+    LeadSchema,
+    LeadLossReasonSchema,
+)
 from .pipelines import PipelineSchema, StatusSchema
 from .users import UserSchema
 from .links import LinkSchema
+from .raw import LazyModel
@@ -1,15 +1,76 @@
-import inspect
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date, datetime, time, timedelta, timezone
-from functools import cached_property
-from typing import Any, Dict, List, Optional, Union
-
-from pydantic import BaseModel, field_serializer
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel, FieldSerializationInfo, PrivateAttr, field_serializer
+from pydantic_core import to_json
 
 from .common import CustomFieldsValueSchema, ValueSchema
 
 t_zone = timezone(offset=timedelta(hours=5))
 
+# validation context of objects read from the API, a snapshot of such objects
+# is taken right after loading and `model_dump_changes` diffs against it
+API_CONTEXT = {"from_api": True}
+
+# values sent as they are, anything else goes through `on_set` and validation
+_PLAIN_TYPES = (str, int, float, bool)
+_VALUE_KEYS = ("value", "subtype", "enum_id")
+
+_changes_only: ContextVar[bool] = ContextVar("changes_only", default=False)
+
+
+@contextmanager
+def changes_only() -> Iterator[None]:
+    """Serialize only the custom fields changed since the snapshot."""
+    token = _changes_only.set(True)
+    try:
+        yield
+    finally:
+        _changes_only.reset(token)
+
+
+class _Dumped(bytes):
+    """JSON of a mutable value at snapshot time."""
+
+
+# compared as they are, any other value is kept as JSON
+_IMMUTABLE_TYPES = frozenset((type(None), str, int, float, bool, date, datetime))
+
+# raw custom fields are told apart by their id and code
+_FieldKey = Tuple[Optional[int], Optional[str]]
+# snapshot values and the JSON of the unmapped raw custom fields
+_SnapshotState = Tuple[Dict[str, Any], Dict[_FieldKey, bytes]]
+
+
+def _changed(before: Any, value: Any) -> bool:
+    if isinstance(before, _Dumped):
+        return to_json(value) != before
+    return before != value
+
+
+def _value_dict(value: ValueSchema) -> Dict[str, Any]:
+    """`value.model_dump(exclude_unset=True)` without the serializer."""
+    fields_set = value.model_fields_set
+    data = {key: getattr(value, key) for key in _VALUE_KEYS if key in fields_set}
+    item = data.get("value")
+    if isinstance(item, BaseModel):
+        data["value"] = item.model_dump(exclude_unset=True)
+    return data
+
 
 class CustomFieldType(ABC):
     valid_type: List[str] = []
@@ -35,6 +96,17 @@ class CustomFieldType(ABC):
     def on_set(self, values):
         raise NotImplementedError
 
+    def to_dict(self, values) -> Dict[str, Any]:
+        """`on_set(values)` dumped with exclude_unset, overridden by plain dicts."""
+        return self.on_set(values=values).model_dump(exclude_unset=True)
+
+    def _dict(self, values: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        return {
+            "field_id": self.field_id,
+            "field_code": self.field_code,
+            "values": values,
+        }
+
 
 class TextField(CustomFieldType):
     """return -> str"""
@@ -57,6 +129,13 @@ class TextField(CustomFieldType):
             values=[ValueSchema(value=values)],
         )
 
+    def to_dict(self, values: str) -> Dict[str, Any]:
+        if values is None:
+            values = ""
+        if type(values) not in _PLAIN_TYPES:
+            return super().to_dict(values)
+        return self._dict([{"value": values}])
+
 
 class URLField(TextField):
     valid_type = ["url"]
@@ -83,6 +162,11 @@ class CheckboxField(CustomFieldType):
             values=[ValueSchema(value=values)],
         )
 
+    def to_dict(self, values: bool) -> Dict[str, Any]:
+        if values is not None and type(values) not in _PLAIN_TYPES:
+            return super().to_dict(values)
+        return self._dict([{"value": values}])
+
 
 class SelectField(CustomFieldType):
     """return -> Value"""
@@ -97,6 +181,28 @@ class SelectField(CustomFieldType):
     ) -> None:
         self.enums = enums
         super().__init__(field_id, field_code)
+        # reverse indexes: enum_id / value -> (position in enums, key),
+        # first match wins as in a linear scan over enums
+        self._keys_by_enum_id: Dict[Any, Tuple[int, Any]] = {}
+        self._keys_by_value: Dict[Any, Tuple[int, Any]] = {}
+        for position, (key, enum_value) in enumerate((enums or {}).items()):
+            self._keys_by_enum_id.setdefault(enum_value.enum_id, (position, key))
+            try:
+                self._keys_by_value.setdefault(enum_value.value, (position, key))
+            except TypeError:
+                pass
+
+    def _enum_key(self, value: ValueSchema) -> Optional[Tuple[int, Any]]:
+        by_enum_id = self._keys_by_enum_id.get(value.enum_id)
+        if value.enum_id:
+            return by_enum_id
+        try:
+            by_value = self._keys_by_value.get(value.value)
+        except TypeError:
+            by_value = None
+        if by_enum_id is None or by_value is None:
+            return by_enum_id or by_value
+        return min(by_enum_id, by_value)
 
     def on_get(
         self, values: Optional[List[ValueSchema]]
@@ -105,11 +211,9 @@ class SelectField(CustomFieldType):
             value = values[0]
 
             if self.enums:
-                for key, enum_value in self.enums.items():
-                    if enum_value.enum_id == value.enum_id or (
-                        not value.enum_id and enum_value.value == value.value
-                    ):
-                        return key
+                found = self._enum_key(value)
+                if found is not None:
+                    return found[1]
 
             return value
         return None
@@ -128,6 +232,17 @@ class SelectField(CustomFieldType):
             field_id=self.field_id, field_code=self.field_code, values=assign_values
         )
 
+    def to_dict(self, values: ValueSchema) -> Dict[str, Any]:
+        if values is None:
+            return self._dict(None)
+        if self.enums:
+            if not self.enums.get(values):
+                raise ValueError(values)
+            values = self.enums[values]
+        if type(values) is not ValueSchema:
+            return super().to_dict(values)
+        return self._dict([_value_dict(values)])
+
 
 class RadioButtonField(SelectField):
     valid_type = ["radiobutton"]
@@ -142,7 +257,8 @@ class MultiSelectField(CustomFieldType):
         self, values: Optional[List[ValueSchema]]
     ) -> Optional[List[ValueSchema]]:
         if values:
-            return values
+            # a copy, so appending to it is seen as a change
+            return list(values)
         return None
 
     def on_set(self, values: List[ValueSchema]) -> CustomFieldsValueSchema:
@@ -153,6 +269,15 @@ class MultiSelectField(CustomFieldType):
             field_id=self.field_id, field_code=self.field_code, values=assign_values
         )
 
+    def to_dict(self, values: List[ValueSchema]) -> Dict[str, Any]:
+        if values is None:
+            return self._dict(None)
+        if type(values) is not list or any(
+            type(value) is not ValueSchema for value in values
+        ):
+            return super().to_dict(values)
+        return self._dict([_value_dict(value) for value in values])
+
 
 class MultiTextField(MultiSelectField):
     valid_type = ["multitext"]
@@ -180,6 +305,11 @@ class NumericField(CustomFieldType):
             values=assign_value,
         )
 
+    def to_dict(self, values: float) -> Dict[str, Any]:
+        if values is None:
+            return self._dict(None)
+        return self._dict([{"value": str(values)}])
+
 
 class DateField(CustomFieldType):
     """return -> Date"""
@@ -210,6 +340,12 @@ class DateField(CustomFieldType):
             field_id=self.field_id, field_code=self.field_code, values=assign_value
         )
 
+    def to_dict(self, values: date) -> Dict[str, Any]:
+        if values is None:
+            return self._dict(None)
+        timestamp = datetime.combine(date=values, time=time(0, 0, 0, 0)).timestamp()
+        return self._dict([{"value": int(timestamp)}])
+
 
 class DateTimeField(CustomFieldType):
     """return -> Datetime"""
@@ -234,80 +370,265 @@ class DateTimeField(CustomFieldType):
             values=assign_value,
         )
 
+    def to_dict(self, values: datetime) -> Dict[str, Any]:
+        if values is None:
+            return self._dict(None)
+        return self._dict([{"value": int(values.timestamp())}])
 
-class BaseModelForFieldsSchema(BaseModel):
-    custom_fields_values: Optional[List[CustomFieldsValueSchema]] = None
 
-    # @cached_property
-    def _all_annotations(self) -> dict:
-        all_annotations = {}
-        for parent_cls in reversed(self.__class__.__mro__):
-            all_annotations.update(inspect.get_annotations(parent_cls))
-        return all_annotations
+class CustomFieldsIndex:
+    """Custom fields declared on a model, resolved once per class."""
+
+    __slots__ = ("fields", "by_id", "by_code", "mapped", "direct_assignment")
 
-    # @cached_property
-    def _custom_fields_type(self) -> dict:
-        field_types = {}
+    def __init__(
+        self, fields: Dict[str, CustomFieldType], direct_assignment: bool = False
+    ) -> None:
+        self.fields = fields
+        self.direct_assignment = direct_assignment
+        self.by_id: Dict[int, List[Tuple[str, CustomFieldType]]] = {}
+        self.by_code: Dict[str, List[Tuple[str, CustomFieldType]]] = {}
+        # ids and codes of mapped fields, raw values with these are replaced
+        self.mapped: set = set()
+        for key, custom_type in fields.items():
+            if custom_type.field_id is not None:
+                self.mapped.add(custom_type.field_id)
+            if custom_type.field_code is not None:
+                self.mapped.add(custom_type.field_code)
+            if custom_type.field_id:
+                self.by_id.setdefault(custom_type.field_id, []).append(
+                    (key, custom_type)
+                )
+            elif custom_type.field_code:
+                self.by_code.setdefault(custom_type.field_code, []).append(
+                    (key, custom_type)
+                )
+
+    def targets(
+        self, field: CustomFieldsValueSchema
+    ) -> Optional[List[Tuple[str, CustomFieldType]]]:
+        """Model fields a raw custom field value is mapped to."""
+        targets = (
+            self.by_id.get(field.field_id) if field.field_id else None  # type: ignore
+        )
+        if field.field_code and field.field_code in self.by_code:
+            targets = (targets or []) + self.by_code[field.field_code]
+        return targets
+
+    @classmethod
+    def from_model(cls, model: Type[BaseModel]) -> "CustomFieldsIndex":
+        fields = {}
+        for key, field_info in model.model_fields.items():
+            for metadata in field_info.metadata:
+                if isinstance(metadata, CustomFieldType):
+                    fields[key] = metadata
+        # values can be written to __dict__ directly unless pydantic has to
+        # validate the assignment or the attribute is a custom descriptor
+        direct_assignment = not model.model_config.get("validate_assignment") and all(
+            not hasattr(getattr(model, key, None), "__set__") for key in fields
+        )
+        return cls(fields, direct_assignment)
+
+
+class BaseModelForFieldsSchema(BaseModel):
+    custom_fields_values: Optional[List[CustomFieldsValueSchema]] = None
 
-        for key, field_type in self._all_annotations().items():
-            if hasattr(field_type, "__metadata__"):
-                for metadata in field_type.__metadata__:
-                    if isinstance(metadata, CustomFieldType):
-                        field_types[key] = metadata
-                        continue
+    _custom_fields_index: ClassVar[CustomFieldsIndex] = CustomFieldsIndex({})
+    # serialized fields compared with the snapshot, besides the custom fields
+    _tracked_fields: ClassVar[Tuple[str, ...]] = ()
+    _snapshot_fields: ClassVar[Tuple[str, ...]] = ()
+    # field values at snapshot time, mutable ones as JSON
+    _snapshot: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    # unmapped raw custom fields at snapshot time, as JSON
+    _snapshot_custom_fields: Optional[Dict[_FieldKey, bytes]] = PrivateAttr(
+        default=None
+    )
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._custom_fields_index = CustomFieldsIndex.from_model(cls)
+        cls._tracked_fields = tuple(
+            key
+            for key, field_info in cls.model_fields.items()
+            if not field_info.exclude and key != "custom_fields_values"
+        )
+        cls._snapshot_fields = cls._tracked_fields + tuple(
+            cls._custom_fields_index.fields
+        )
 
-        return field_types
+    def _custom_fields_type(self) -> Dict[str, CustomFieldType]:
+        return self._custom_fields_index.fields
 
     def model_post_init(self, __context) -> None:
-        if self.custom_fields_values and len(self.custom_fields_values) > 0:
-            custom_fields: dict[Union[str, int], CustomFieldsValueSchema] = {}
-            for custom_field in self.custom_fields_values:
-                if custom_field.field_id:
-                    custom_fields[custom_field.field_id] = custom_field
-                if custom_field.field_code:
-                    custom_fields[custom_field.field_code] = custom_field
-
-            for key, custom_types in self._custom_fields_type().items():
-                if custom_types.field_id:
-                    field = custom_fields.get(custom_types.field_id)
-                elif custom_types.field_code:
-                    field = custom_fields.get(custom_types.field_code)
-
-                if field:
-                    if (
-                        field.field_type
-                        and field.field_type not in custom_types.valid_type
-                    ):
-                        raise TypeError
-                    value = custom_types.on_get(values=field.values)
+        index = self._custom_fields_index
+        if self.custom_fields_values and index.fields:
+            self._map_custom_fields(index)
+        if __context and __context.get("from_api"):
+            self.model_snapshot()
+
+    def _map_custom_fields(self, index: CustomFieldsIndex) -> None:
+        direct = index.direct_assignment
+        values = self.__dict__
+        fields_set = self.__pydantic_fields_set__
+        for field in self.custom_fields_values:  # type: ignore
+            targets = index.targets(field)
+            if not targets:
+                continue
+
+            for key, custom_types in targets:
+                if field.field_type and field.field_type not in custom_types.valid_type:
+                    raise TypeError
+                value = custom_types.on_get(values=field.values)
+                if direct:
+                    # same result as __setattr__ without pydantic's
+                    # assignment machinery
+                    values[key] = value
+                    fields_set.add(key)
+                else:
                     self.__setattr__(key, value)
-    
+
+    def _private(self, key: str) -> Any:
+        # private attributes go through BaseModel.__getattr__, which is slow
+        return self.__pydantic_private__[key]  # type: ignore
+
+    def _snapshot_state(self) -> _SnapshotState:
+        values = self.__dict__
+        snapshot = {}
+        for key in self._snapshot_fields:
+            value = values[key]
+            # mutable values are kept as JSON, so changes made in place are seen
+            if type(value) not in _IMMUTABLE_TYPES:
+                value = _Dumped(to_json(value))
+            snapshot[key] = value
+        raw = {key: to_json(field) for key, field in self._raw_custom_fields()}
+        return snapshot, raw
+
+    def _raw_custom_fields(self) -> Iterator[Tuple[_FieldKey, CustomFieldsValueSchema]]:
+        """Raw custom fields not replaced by a mapped one, with their keys."""
+        mapped = self._custom_fields_index.mapped
+        for field in self.custom_fields_values or ():
+            if field.field_id in mapped or field.field_code in mapped:
+                continue
+            yield (field.field_id, field.field_code), field
+
+    def _raw_custom_fields_changes(
+        self,
+    ) -> Tuple[List[CustomFieldsValueSchema], List[_FieldKey]]:
+        """Raw custom fields changed since the snapshot and the removed keys."""
+        loaded = self._private("_snapshot_custom_fields")
+        changed = []
+        keys = set()
+        for key, field in self._raw_custom_fields():
+            keys.add(key)
+            if loaded.get(key) != to_json(field):
+                changed.append(field)
+        return changed, [key for key in loaded if key not in keys]
+
+    def model_snapshot(self, state: Optional[_SnapshotState] = None) -> None:
+        """
+        Remember the current values as saved. Objects read from the API get
+        one on load, the update methods take a new one after a save. `state`
+        from `_snapshot_state()` remembers the values as they were then.
+        """
+        if state is None:
+            state = self._snapshot_state()
+        private = self.__pydantic_private__
+        private["_snapshot"], private["_snapshot_custom_fields"] = state  # type: ignore
+
+    def model_changed_fields(self) -> Set[str]:
+        """
+        Fields changed since the snapshot, every set field without one.
+        Values have to be serializable to be compared.
+        """
+        snapshot = self._private("_snapshot")
+        if snapshot is None:
+            return set(self.model_fields_set)
+
+        values = self.__dict__
+        changed = {
+            key for key, before in snapshot.items() if _changed(before, values[key])
+        }
+        if any(self._raw_custom_fields_changes()):
+            changed.add("custom_fields_values")
+        return changed
+
+    def model_has_changes(self) -> bool:
+        """False only when the snapshot says there is nothing to send."""
+        if self._private("_snapshot") is None:
+            return True
+        return bool(self.model_changed_fields() - {"id"})
+
+    def model_dump_changes(self, **kwargs: Any) -> Dict[str, Any]:
+        """
+        `model_dump(exclude_unset=True)` limited to the fields changed since
+        the snapshot and the id. Without a snapshot everything set is dumped.
+        """
+        if self._private("_snapshot") is None:
+            return self.model_dump(exclude_unset=True, **kwargs)
+
+        changed = self.model_changed_fields()
+        include = {key for key in self._tracked_fields if key in changed}
+        if "id" in self.model_fields:
+            include.add("id")
+        target = self
+        if "custom_fields_values" in changed or any(
+            key in changed for key in self._custom_fields_index.fields
+        ):
+            include.add("custom_fields_values")
+            if "custom_fields_values" not in self.__pydantic_fields_set__:
+                # exclude_unset would drop it, a shallow copy marks it as set
+                # without touching the fields set of this object
+                target = self.model_copy()
+                target.__pydantic_fields_set__.add("custom_fields_values")
+
+        with changes_only():
+            return target.model_dump(exclude_unset=True, include=include, **kwargs)
+
     @field_serializer("custom_fields_values")
     def serialize_courses_in_order(
-        self, custom_fields_values: Optional[List[CustomFieldsValueSchema]]
+        self,
+        custom_fields_values: Optional[List[CustomFieldsValueSchema]],
+        info: FieldSerializationInfo,
     ):
-        if custom_fields_values is None:
-            custom_fields_values = []
-
-        new_custom_fields_values = []
-        field_ids: List[Union[int, str]] = []
+        index = self._custom_fields_index
+        # plain dicts give the same output as long as unset fields are dropped
+        # and nothing else is
+        as_dict = (
+            info.exclude_unset and not info.exclude_none and not info.exclude_defaults
+        )
+        snapshot = self._private("_snapshot") if _changes_only.get() else None
 
-        for key, custom_types in self._custom_fields_type().items():
+        new_custom_fields_values: List[Any] = []
+        for key, custom_types in index.fields.items():
             values = self.__getattribute__(key)
-            if custom_types.field_id is not None:
-                field_ids.append(custom_types.field_id)
-            if custom_types.field_code is not None:
-                field_ids.append(custom_types.field_code)
+            if snapshot is not None and not _changed(snapshot[key], values):
+                continue
 
             # if values is not None:
-            field_with_value = custom_types.on_set(values=values)
-            new_custom_fields_values.append(field_with_value)
-
-        for custom_field in custom_fields_values:
-            if (
-                custom_field.field_id not in field_ids
-                and custom_field.field_code not in field_ids
-            ):
-                new_custom_fields_values.append(custom_field)
-
+            if as_dict:
+                new_custom_fields_values.append(custom_types.to_dict(values=values))
+            else:
+                new_custom_fields_values.append(custom_types.on_set(values=values))
+
+        if snapshot is None:
+            new_custom_fields_values.extend(
+                field for _, field in self._raw_custom_fields()
+            )
+            return new_custom_fields_values
+
+        changed, removed = self._raw_custom_fields_changes()
+        new_custom_fields_values.extend(changed)
+        # fields removed from the list are cleared
+        for field_id, field_code in removed:
+            cleared: Any = {
+                "field_id": field_id,
+                "field_code": field_code,
+                "values": None,
+            }
+            if not as_dict:
+                cleared = CustomFieldsValueSchema(
+                    field_id=field_id, field_code=field_code, values=None
+                )
+            new_custom_fields_values.append(cleared)
         return new_custom_fields_values
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+
+from .errors import Error
+
+
+class BatchItemResultSchema(BaseModel):
+    index: int
+    item: Any
+    id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    response: Any = None
+    errors: List[Error] = []
+    # the item itself is valid, but amoCRM refused the whole batch
+    rejected: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.id is not None
@@ -83,7 +83,13 @@ class ListModelSchema(BaseModel, Generic[K]):
 
 class UpdateResponseSchema(BaseModel):
     id: int
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
+    request_id: Optional[str] = None
+
+
+class CreateResponseSchema(BaseModel):
+    id: int
+    request_id: Optional[str] = None
 
 
 class ComplexCreateResponseSchema(BaseModel):
@@ -91,6 +97,8 @@ class ComplexCreateResponseSchema(BaseModel):
     contact_id: Optional[int] = None
     company_id: Optional[int] = None
     merged: Optional[bool] = None
+    # /leads/complex answers with a list, e.g. ["0"]
+    request_id: Optional[List[str]] = None
 
 
 class TagSchema(BaseModel):
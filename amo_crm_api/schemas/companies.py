@@ -0,0 +1,19 @@
+from typing import Annotated, List, Optional
+
+from pydantic import AliasChoices, Field
+
+from .base_model import BaseModelForFieldsSchema
+from .common import CustomFieldsValueSchema, TagSchema
+
+
+class CompanySchema(BaseModelForFieldsSchema):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    responsible_user_id: Optional[int] = None
+    group_id: Optional[int] = None
+    custom_fields_values: Annotated[
+        Optional[List[CustomFieldsValueSchema]],
+        Field(validation_alias=AliasChoices("custom_fields", "custom_fields_values")),
+    ] = None
+    account_id: Optional[int] = None
+    tags: Annotated[List[TagSchema], Field(exclude=True)] = []
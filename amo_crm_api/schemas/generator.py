@@ -0,0 +1,276 @@
+import keyword
+import re
+from datetime import date, datetime
+from typing import (
+    Annotated,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import Field, create_model
+
+from .base_model import (
+    AddressField,
+    BaseModelForFieldsSchema,
+    CheckboxField,
+    CustomFieldType,
+    DateField,
+    DateTimeField,
+    MultiSelectField,
+    MultiTextField,
+    NumericField,
+    RadioButtonField,
+    SelectField,
+    TextField,
+    URLField,
+)
+from .common import ValueSchema
+from .contacts import ContactSchema
+from .custom_fields import CustomFieldSchema
+from .leads import LeadSchema
+
+_SELECT_VALUE = Optional[Union[str, ValueSchema]]
+_VALUE_LIST = Optional[List[ValueSchema]]
+
+# amoCRM field type -> (custom field type, annotation, annotation source)
+FIELD_TYPES: Dict[str, Tuple[Type[CustomFieldType], Any, str]] = {
+    "text": (TextField, Optional[str], "Optional[str]"),
+    "textarea": (TextField, Optional[str], "Optional[str]"),
+    "url": (URLField, Optional[str], "Optional[str]"),
+    "streetaddress": (AddressField, Optional[str], "Optional[str]"),
+    "checkbox": (CheckboxField, Optional[bool], "Optional[bool]"),
+    "select": (SelectField, _SELECT_VALUE, "Optional[Union[str, ValueSchema]]"),
+    "radiobutton": (
+        RadioButtonField,
+        _SELECT_VALUE,
+        "Optional[Union[str, ValueSchema]]",
+    ),
+    "multiselect": (MultiSelectField, _VALUE_LIST, "Optional[List[ValueSchema]]"),
+    "multitext": (MultiTextField, _VALUE_LIST, "Optional[List[ValueSchema]]"),
+    "numeric": (NumericField, Optional[float], "Optional[float]"),
+    "date": (DateField, Optional[date], "Optional[date]"),
+    "birthday": (DateField, Optional[date], "Optional[date]"),
+    "date_time": (DateTimeField, Optional[datetime], "Optional[datetime]"),
+}
+
+
+class GeneratedField(NamedTuple):
+    name: str
+    definition: CustomFieldSchema
+    custom_type: CustomFieldType
+    annotation: Any
+    annotation_source: str
+
+
+def _enums(definition: CustomFieldSchema) -> Dict[str, ValueSchema]:
+    enums: Dict[str, ValueSchema] = {}
+    for enum in definition.enums or ():
+        # first option wins when labels repeat
+        enums.setdefault(enum.value, ValueSchema(value=enum.value, enum_id=enum.id))
+    return enums
+
+
+def _is_valid_name(name: str) -> bool:
+    # pydantic keeps "_" names private and reserves the "model_" namespace
+    return (
+        name.isidentifier()
+        and not keyword.iskeyword(name)
+        and not name.startswith(("_", "model_"))
+    )
+
+
+def _is_free(name: str, used: set, base: Type[BaseModelForFieldsSchema]) -> bool:
+    """Not a field or an attribute of `base`, nor generated already."""
+    return name not in used and not hasattr(base, name)
+
+
+def _field_name(
+    definition: CustomFieldSchema, used: set, base: Type[BaseModelForFieldsSchema]
+) -> str:
+    source = definition.code or definition.name
+    name = re.sub(r"[^0-9a-zA-Z]+", "_", source).strip("_").lower()
+    if not _is_valid_name(name):
+        name = f"field_{definition.id}"
+    if not _is_free(name, used, base):
+        name = f"{name}_{definition.id}"
+    return name
+
+
+def _override_names(
+    definitions: List[CustomFieldSchema],
+    names: Dict[int, str],
+    used: set,
+    base: Type[BaseModelForFieldsSchema],
+) -> Dict[int, str]:
+    """Overrides of the fields to generate, refused when a name is not usable."""
+    overrides: Dict[int, str] = {}
+    for definition in definitions:
+        name = names.get(definition.id)
+        if name is None:
+            continue
+        if not _is_valid_name(name):
+            raise ValueError(f"invalid field name for custom field {definition.id}")
+        if not _is_free(name, used, base) or name in overrides.values():
+            raise ValueError(
+                f"field name {name!r} of custom field {definition.id} is taken"
+            )
+        overrides[definition.id] = name
+    return overrides
+
+
+def build_fields(
+    definitions: Iterable[CustomFieldSchema],
+    base: Type[BaseModelForFieldsSchema] = LeadSchema,
+    names: Optional[Dict[int, str]] = None,
+) -> List[GeneratedField]:
+    """
+    Map custom field definitions to model fields. Fields of unsupported types
+    and fields `base` already maps are skipped, `names` overrides field names
+    by custom field id. An override that is not a valid name or is taken
+    raises ValueError.
+    """
+    names = names or {}
+    used = set(base.model_fields)
+    mapped_ids = {
+        custom_type.field_id
+        for custom_type in base._custom_fields_index.fields.values()
+    }
+    mapped_codes = {
+        custom_type.field_code
+        for custom_type in base._custom_fields_index.fields.values()
+    }
+
+    selected = [
+        definition
+        for definition in sorted(definitions, key=lambda item: (item.sort, item.id))
+        if definition.type in FIELD_TYPES
+        and definition.id not in mapped_ids
+        and not (definition.code and definition.code in mapped_codes)
+    ]
+    overrides = _override_names(selected, names, used, base)
+    # generated names keep clear of the overrides
+    used.update(overrides.values())
+
+    fields = []
+    for definition in selected:
+        field_class, annotation, annotation_source = FIELD_TYPES[definition.type]
+        if issubclass(field_class, SelectField):
+            custom_type: CustomFieldType = field_class(
+                field_id=definition.id, enums=_enums(definition)
+            )
+        else:
+            custom_type = field_class(field_id=definition.id)
+
+        name = overrides.get(definition.id) or _field_name(definition, used, base)
+        used.add(name)
+        fields.append(
+            GeneratedField(name, definition, custom_type, annotation, annotation_source)
+        )
+    return fields
+
+
+def create_schema(
+    definitions: Iterable[CustomFieldSchema],
+    name: str = "AccountLeadSchema",
+    base: Type[BaseModelForFieldsSchema] = LeadSchema,
+    names: Optional[Dict[int, str]] = None,
+) -> Type[BaseModelForFieldsSchema]:
+    """Build a `base` subclass with every custom field mapped."""
+    fields: Dict[str, Any] = {
+        field.name: (
+            Annotated[field.annotation, field.custom_type, Field(exclude=True)],
+            None,
+        )
+        for field in build_fields(definitions, base, names)
+    }
+    return create_model(name, __base__=base, **fields)
+
+
+def create_account_schemas(
+    lead_fields: Iterable[CustomFieldSchema],
+    contact_fields: Iterable[CustomFieldSchema],
+    names: Optional[Dict[int, str]] = None,
+) -> Tuple[Type[LeadSchema], Type[ContactSchema]]:
+    lead_schema = create_schema(lead_fields, "AccountLeadSchema", LeadSchema, names)
+    contact_schema = create_schema(
+        contact_fields, "AccountContactSchema", ContactSchema, names
+    )
+    return lead_schema, contact_schema  # type: ignore
+
+
+def _render_custom_type(field: GeneratedField) -> List[str]:
+    class_name = type(field.custom_type).__name__
+    if not isinstance(field.custom_type, SelectField):
+        return [f"{class_name}(field_id={field.definition.id}),"]
+
+    lines = [f"{class_name}(", f"    field_id={field.definition.id},", "    enums={"]
+    for key, value in (field.custom_type.enums or {}).items():
+        lines.append(
+            f"        {key!r}: ValueSchema(value={value.value!r}, "
+            f"enum_id={value.enum_id}),"
+        )
+    lines += ["    },", "),"]
+    return lines
+
+
+def render_schema(
+    definitions: Iterable[CustomFieldSchema],
+    name: str = "AccountLeadSchema",
+    base: Type[BaseModelForFieldsSchema] = LeadSchema,
+    names: Optional[Dict[int, str]] = None,
+) -> str:
+    """Source of a class equal to `create_schema(...)`, to be kept in a project."""
+    lines = [f"class {name}({base.__name__}):"]
+    fields = build_fields(definitions, base, names)
+    for field in fields:
+        label = " ".join(field.definition.name.split())
+        lines.append(f"    # {label} ({field.definition.type})")
+        lines.append(f"    {field.name}: Annotated[")
+        lines.append(f"        {field.annotation_source},")
+        lines.extend(f"        {line}" for line in _render_custom_type(field))
+        lines.append("        Field(exclude=True),")
+        lines.append("    ] = None")
+    if not fields:
+        lines.append("    pass")
+    return "\n".join(lines) + "\n"
+
+
+def render_account_schemas(
+    lead_fields: Iterable[CustomFieldSchema],
+    contact_fields: Iterable[CustomFieldSchema],
+    names: Optional[Dict[int, str]] = None,
+) -> str:
+    """A complete module with the lead and contact schemas of an account."""
+    header = [
+        "# Generated from the account custom fields, regenerate instead of editing.",
+        "from datetime import date, datetime",
+        "from typing import Annotated, List, Optional, Union",
+        "",
+        "from pydantic import Field",
+        "",
+        "from amo_crm_api.schemas import ContactSchema, LeadSchema, ValueSchema",
+        "from amo_crm_api.schemas.base_model import (",
+        *(
+            f"    {class_name},"
+            for class_name in sorted(
+                {field_class.__name__ for field_class, _, _ in FIELD_TYPES.values()}
+            )
+        ),
+        ")",
+        "",
+        "",
+        "",
+    ]
+    return (
+        "\n".join(header)
+        + render_schema(lead_fields, "AccountLeadSchema", LeadSchema, names)
+        + "\n\n"
+        + render_schema(contact_fields, "AccountContactSchema", ContactSchema, names)
+    )
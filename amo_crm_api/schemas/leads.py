@@ -5,6 +5,8 @@ from pydantic import AliasChoices, BaseModel, Field
 
 from .base_model import BaseModelForFieldsSchema
 from .common import CustomFieldsValueSchema, TagSchema
+from .companies import CompanySchema
+from .contacts import ContactSchema
 
 
 class LeadContactSchema(BaseModel):
@@ -80,3 +82,9 @@ class LeadSchema(BaseModelForFieldsSchema):
             self.loss_reason = self.embedded.loss_reason
             self.tags = self.embedded.tags
         super().model_post_init(__context)
+
+
+class ComplexLeadSchema(BaseModel):
+    lead: LeadSchema
+    contacts: List[ContactSchema] = []
+    company: Optional[CompanySchema] = None
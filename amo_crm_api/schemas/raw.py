@@ -0,0 +1,167 @@
+import threading
+from copy import copy
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    get_args,
+)
+
+from pydantic import AliasChoices, BaseModel
+from pydantic.fields import FieldInfo
+
+from .base_model import API_CONTEXT
+
+M = TypeVar("M", bound=BaseModel)
+
+_MUTABLE = (list, dict, set)
+_object_setattr = object.__setattr__
+
+
+class _Plan(NamedTuple):
+    # item key -> field name, rank of the key among the field's aliases,
+    # model of nested values
+    keys: Dict[str, Tuple[str, int, Optional[Type[BaseModel]]]]
+    defaults: Dict[str, Any]
+    # fields with defaults that have to be copied for every object
+    mutable: Tuple[str, ...]
+    extra: Optional[Dict[str, Any]]
+    post_init: bool
+
+
+_plans: Dict[Any, _Plan] = {}
+_lock = threading.Lock()
+
+
+class LazyModel(Generic[M]):
+    """
+    Item of an API response validated into `object_type` on first attribute
+    access. Subscripting reads the raw item without validating it.
+    """
+
+    __slots__ = ("raw", "_object_type", "_model")
+
+    def __init__(self, raw: Dict[str, Any], object_type: Type[M]) -> None:
+        self.raw = raw
+        self._object_type = object_type
+        self._model: Optional[M] = None
+
+    @property
+    def validated(self) -> bool:
+        return self._model is not None
+
+    def model(self) -> M:
+        if self._model is None:
+            self._model = self._object_type.model_validate(
+                self.raw, context=API_CONTEXT
+            )
+        return self._model
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model(), name)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def __repr__(self) -> str:
+        return f"LazyModel[{self._object_type.__name__}]({self.raw.get('id')})"
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        model = _nested_model(arg)
+        if model is not None:
+            return model
+    return None
+
+
+def _field_keys(name: str, field_info: FieldInfo) -> Tuple[str, ...]:
+    keys: List[str] = []
+    alias = field_info.validation_alias
+    if isinstance(alias, AliasChoices):
+        keys.extend(choice for choice in alias.choices if isinstance(choice, str))
+    elif isinstance(alias, str):
+        keys.append(alias)
+    if field_info.alias:
+        keys.append(field_info.alias)
+    keys.append(name)
+    return tuple(dict.fromkeys(keys))
+
+
+def _plan(model: Type[BaseModel]) -> _Plan:
+    plan = _plans.get(model)
+    if plan is None:
+        with _lock:
+            keys: Dict[str, Tuple[str, int, Optional[Type[BaseModel]]]] = {}
+            defaults: Dict[str, Any] = {}
+            for name, field_info in model.model_fields.items():
+                nested = _nested_model(field_info.annotation)
+                for rank, key in enumerate(_field_keys(name, field_info)):
+                    keys.setdefault(key, (name, rank, nested))
+                if not field_info.is_required():
+                    defaults[name] = field_info.get_default(call_default_factory=True)
+            mutable = tuple(
+                name for name, value in defaults.items() if type(value) in _MUTABLE
+            )
+            extra: Optional[Dict[str, Any]] = (
+                {} if model.model_config.get("extra") == "allow" else None
+            )
+            plan = _plans[model] = _Plan(
+                keys, defaults, mutable, extra, bool(model.__pydantic_post_init__)
+            )
+    return plan
+
+
+def _construct_value(model: Type[BaseModel], value: Any) -> Any:
+    if type(value) is dict:
+        return construct_model(model, value)
+    if type(value) is list:
+        return [
+            construct_model(model, item) if type(item) is dict else item
+            for item in value
+        ]
+    return value
+
+
+def construct_model(model: Type[M], data: Dict[str, Any]) -> M:
+    """
+    `model.model_construct` for a raw API item: aliases are resolved and
+    nested models are constructed too, unknown keys are dropped. Nothing is
+    validated or converted, timestamps stay ints, so the data has to be
+    trusted. Custom fields are mapped, but no snapshot is taken, so the
+    object is meant to be read rather than sent back.
+    """
+    plan = _plan(model)
+    values = dict(plan.defaults)
+    for name in plan.mutable:
+        values[name] = copy(values[name])
+    # the rank of the key a field was read from, the first alias wins
+    ranks: Dict[str, int] = {}
+    for key, value in data.items():
+        target = plan.keys.get(key)
+        if target is None:
+            continue
+        name, rank, nested = target
+        if ranks.get(name, rank) < rank:
+            continue
+        ranks[name] = rank
+        values[name] = value if nested is None else _construct_value(nested, value)
+
+    # what model_construct does, without looking every field up again
+    obj = model.__new__(model)
+    _object_setattr(obj, "__dict__", values)
+    _object_setattr(obj, "__pydantic_fields_set__", set(ranks))
+    _object_setattr(obj, "__pydantic_extra__", copy(plan.extra))
+    if plan.post_init:
+        obj.model_post_init(None)
+    else:
+        _object_setattr(obj, "__pydantic_private__", None)
+    return obj
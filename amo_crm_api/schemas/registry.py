@@ -0,0 +1,40 @@
+import threading
+from typing import Any, Dict, Iterable, Type
+
+from pydantic import TypeAdapter
+
+from .common import ListModelSchema
+
+_list_schemas: Dict[Any, Type[ListModelSchema]] = {}
+_type_adapters: Dict[Any, TypeAdapter] = {}
+_lock = threading.Lock()
+
+
+def list_schema(object_type: Any) -> Type[ListModelSchema]:
+    """Cached `ListModelSchema[object_type]`."""
+    schema = _list_schemas.get(object_type)
+    if schema is None:
+        with _lock:
+            schema = _list_schemas.get(object_type)
+            if schema is None:
+                schema = _list_schemas[object_type] = ListModelSchema[object_type]
+    return schema
+
+
+def type_adapter(type_: Any) -> TypeAdapter:
+    """Cached `TypeAdapter(type_)`."""
+    adapter = _type_adapters.get(type_)
+    if adapter is None:
+        with _lock:
+            adapter = _type_adapters.get(type_)
+            if adapter is None:
+                adapter = _type_adapters[type_] = TypeAdapter(type_)
+    return adapter
+
+
+def warm_up(list_types: Iterable[Any] = (), adapter_types: Iterable[Any] = ()) -> None:
+    """Build validators up front so the first API call doesn't pay for it."""
+    for object_type in list_types:
+        list_schema(object_type)
+    for type_ in adapter_types:
+        type_adapter(type_)
@@ -0,0 +1,235 @@
+import sqlite3
+import threading
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic_core import to_json
+
+LEADS = "leads"
+CONTACTS = "contacts"
+ENTITIES = (LEADS, CONTACTS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {entity} (
+    id INTEGER PRIMARY KEY,
+    pipeline_id INTEGER,
+    status_id INTEGER,
+    responsible_user_id INTEGER,
+    updated_at INTEGER,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {entity}_pipeline_status
+    ON {entity} (pipeline_id, status_id);
+CREATE INDEX IF NOT EXISTS {entity}_responsible_user
+    ON {entity} (responsible_user_id);
+CREATE INDEX IF NOT EXISTS {entity}_updated_at ON {entity} (updated_at);
+CREATE TABLE IF NOT EXISTS {entity}_custom_fields (
+    entity_id INTEGER NOT NULL,
+    field_id INTEGER NOT NULL,
+    value TEXT,
+    enum_id INTEGER,
+    PRIMARY KEY (entity_id, field_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {entity}_custom_fields_field
+    ON {entity}_custom_fields (field_id, value);
+"""
+
+_Row = Tuple[int, Any, Any, Any, Any, float, str]
+_FieldRow = Tuple[int, int, Optional[str], Optional[int]]
+
+
+class EntityStore:
+    """
+    Local SQLite mirror of leads and contacts.
+
+    Entities are kept as the raw JSON returned by the API next to indexed
+    columns used for local queries. A row older than `max_age` seconds is
+    considered stale and is not served by `get`; None disables the check.
+    """
+
+    def __init__(self, path: str = ":memory:", max_age: Optional[float] = 300):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._connection:
+            for entity in ENTITIES:
+                self._connection.executescript(_SCHEMA.format(entity=entity))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def _check_entity(entity: str) -> None:
+        if entity not in ENTITIES:
+            raise ValueError(f"unknown entity: {entity!r}")
+
+    @staticmethod
+    def _rows(
+        items: Iterable[Dict[str, Any]], fetched_at: float
+    ) -> Tuple[List[_Row], List[_FieldRow]]:
+        rows: List[_Row] = []
+        field_rows: List[_FieldRow] = []
+        for item in items:
+            entity_id = item["id"]
+            rows.append(
+                (
+                    entity_id,
+                    item.get("pipeline_id"),
+                    item.get("status_id"),
+                    item.get("responsible_user_id"),
+                    item.get("updated_at"),
+                    fetched_at,
+                    to_json(item).decode(),
+                )
+            )
+            for field in item.get("custom_fields_values") or ():
+                if field.get("field_id") is None:
+                    continue
+                values = field.get("values") or [{}]
+                value = values[0].get("value")
+                field_rows.append(
+                    (
+                        entity_id,
+                        field["field_id"],
+                        None if value is None else str(value),
+                        values[0].get("enum_id"),
+                    )
+                )
+        return rows, field_rows
+
+    def upsert(
+        self,
+        entity: str,
+        items: Iterable[Dict[str, Any]],
+        fetched_at: Optional[float] = None,
+    ) -> int:
+        """Insert or replace raw API objects in a single transaction."""
+        self._check_entity(entity)
+        rows, field_rows = self._rows(
+            items, fetched_at if fetched_at is not None else time()
+        )
+        if not rows:
+            return 0
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"DELETE FROM {entity}_custom_fields WHERE entity_id = ?",
+                ((row[0],) for row in rows),
+            )
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO {entity} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO {entity}_custom_fields VALUES (?, ?, ?, ?)",
+                field_rows,
+            )
+        return len(rows)
+
+    def delete(self, entity: str, ids: Iterable[int]) -> None:
+        self._check_entity(entity)
+        params = [(entity_id,) for entity_id in ids]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"DELETE FROM {entity}_custom_fields WHERE entity_id = ?", params
+            )
+            self._connection.executemany(f"DELETE FROM {entity} WHERE id = ?", params)
+
+    def clear(self, entity: str) -> None:
+        self._check_entity(entity)
+        with self._lock, self._connection:
+            self._connection.execute(f"DELETE FROM {entity}_custom_fields")
+            self._connection.execute(f"DELETE FROM {entity}")
+
+    def _fresh_after(self, max_age: Optional[float]) -> Optional[float]:
+        max_age = self.max_age if max_age is None else max_age
+        return None if max_age is None else time() - max_age
+
+    def get(
+        self, entity: str, entity_id: int, max_age: Optional[float] = None
+    ) -> Optional[str]:
+        """Raw JSON of a fresh entity, None when missing or stale."""
+        self._check_entity(entity)
+        query = f"SELECT data FROM {entity} WHERE id = ?"
+        params: List[Any] = [entity_id]
+        fresh_after = self._fresh_after(max_age)
+        if fresh_after is not None:
+            query += " AND fetched_at >= ?"
+            params.append(fresh_after)
+
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def query(
+        self,
+        entity: str,
+        pipeline_id: Optional[int] = None,
+        status_id: Optional[int] = None,
+        responsible_user_id: Optional[int] = None,
+        updated_from: Optional[int] = None,
+        updated_to: Optional[int] = None,
+        custom_field_id: Optional[int] = None,
+        custom_field_value: Optional[Any] = None,
+        max_age: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """Raw JSON of stored entities matching every given criterion."""
+        self._check_entity(entity)
+        conditions = []
+        params: List[Any] = []
+        for column, value in (
+            ("pipeline_id", pipeline_id),
+            ("status_id", status_id),
+            ("responsible_user_id", responsible_user_id),
+        ):
+            if value is not None:
+                conditions.append(f"e.{column} = ?")
+                params.append(value)
+        if updated_from is not None:
+            conditions.append("e.updated_at >= ?")
+            params.append(updated_from)
+        if updated_to is not None:
+            conditions.append("e.updated_at <= ?")
+            params.append(updated_to)
+        fresh_after = self._fresh_after(max_age)
+        if fresh_after is not None:
+            conditions.append("e.fetched_at >= ?")
+            params.append(fresh_after)
+
+        query = f"SELECT e.data FROM {entity} e"
+        if custom_field_id is not None:
+            query += f" JOIN {entity}_custom_fields f ON f.entity_id = e.id"
+            conditions.append("f.field_id = ?")
+            params.append(custom_field_id)
+            if custom_field_value is not None:
+                conditions.append("f.value = ?")
+                params.append(str(custom_field_value))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY e.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            return [row[0] for row in self._connection.execute(query, params)]
+
+    def count(self, entity: str) -> int:
+        self._check_entity(entity)
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT COUNT(*) FROM {entity}"
+            ).fetchone()[0]
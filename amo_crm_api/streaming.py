@@ -0,0 +1,210 @@
+import codecs
+import json
+import re
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TYPES = (int, float)
+# characters that continue a number decoded from a prefix of it
+_NUMBER_CHARS = frozenset(".eE+-0123456789")
+
+# parser states
+_OBJECT = "object"
+_FIRST_KEY = "first_key"
+_NEXT_KEY = "next_key"
+_SKIP_VALUE = "skip_value"
+_ARRAY = "array"
+_FIRST_ITEM = "first_item"
+_NEXT_ITEM = "next_item"
+_ITEM = "item"
+_DONE = "done"
+
+
+class _NeedMore(Exception):
+    pass
+
+
+class JSONArrayParser:
+    """
+    Incremental parser of the array found under the `path` keys of a JSON
+    document fed in chunks, such as ("_embedded", "leads") of a page.
+
+    `feed` returns the array items completed by a chunk, decoded one at a
+    time, so only the unconsumed tail of the input and a single item are
+    held in memory. Values outside the path are skipped without being kept.
+    A missing path or a non-array value gives no items.
+    """
+
+    def __init__(self, path: Sequence[str]) -> None:
+        self.path = tuple(path)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._state = _OBJECT
+        self._level = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(chunk)
+        self._pos = 0
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """Items left at the end of input, raises if the document is cut short."""
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(b"", True)
+        self._pos = 0
+        self._eof = True
+        items = self._parse()
+        if self._state != _DONE:
+            raise ValueError("unexpected end of JSON input")
+        return items
+
+    def _parse(self) -> List[Any]:
+        items: List[Any] = []
+        try:
+            while self._state != _DONE:
+                self._step(items)
+        except _NeedMore:
+            if self._eof:
+                raise ValueError("unexpected end of JSON input") from None
+        return items
+
+    def _skip_whitespace(self, pos: int) -> int:
+        pos = _WHITESPACE.match(self._buffer, pos).end()  # type: ignore
+        if pos >= len(self._buffer):
+            raise _NeedMore
+        return pos
+
+    def _decode(self, pos: int) -> Tuple[Any, int]:
+        try:
+            value, end = self._json.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            raise _NeedMore from None
+        # a number may go on in the next chunk: when it ends the buffer, or
+        # when only the part before a fraction or an exponent was decoded
+        if not self._eof and type(value) in _NUMBER_TYPES:
+            if end >= len(self._buffer) or self._buffer[end] in _NUMBER_CHARS:
+                raise _NeedMore
+        return value, end
+
+    def _step(self, items: List[Any]) -> None:
+        state = self._state
+        pos = self._skip_whitespace(self._pos)
+        char = self._buffer[pos]
+
+        if state == _OBJECT:
+            if char != "{":
+                if self._level == 0:
+                    raise ValueError("JSON input is not an object")
+                self._state = _DONE
+                return
+            self._pos, self._state = pos + 1, _FIRST_KEY
+
+        elif state in (_FIRST_KEY, _NEXT_KEY):
+            if char == "}":
+                # the object on the path ended without the next key
+                self._state = _DONE
+                return
+            if state == _NEXT_KEY:
+                if char != ",":
+                    raise ValueError(f"unexpected {char!r} in JSON object")
+                pos = self._skip_whitespace(pos + 1)
+            key, pos = self._decode(pos)
+            pos = self._skip_whitespace(pos)
+            if self._buffer[pos] != ":":
+                raise ValueError("expected ':' in JSON object")
+            self._pos = pos + 1
+            if key != self.path[self._level]:
+                self._state = _SKIP_VALUE
+            elif self._level + 1 < len(self.path):
+                self._level += 1
+                self._state = _OBJECT
+            else:
+                self._state = _ARRAY
+
+        elif state == _SKIP_VALUE:
+            _, self._pos = self._decode(pos)
+            self._state = _NEXT_KEY
+
+        elif state == _ARRAY:
+            if char != "[":
+                self._state = _DONE
+                return
+            self._pos, self._state = pos + 1, _FIRST_ITEM
+
+        elif state in (_FIRST_ITEM, _NEXT_ITEM):
+            if char == "]":
+                self._pos, self._state = pos + 1, _DONE
+                return
+            if state == _NEXT_ITEM:
+                if char != ",":
+                    raise ValueError(f"unexpected {char!r} in JSON array")
+                self._pos, self._state = pos + 1, _ITEM
+                return
+            self._state = _ITEM
+
+        elif state == _ITEM:
+            item, self._pos = self._decode(pos)
+            self._state = _NEXT_ITEM
+            items.append(item)
+
+
+def iter_array_batches(
+    chunks: Iterable[bytes], path: Sequence[str]
+) -> Iterator[List[Any]]:
+    """Items of the array under `path`, in the batches `chunks` complete."""
+    parser = JSONArrayParser(path)
+    for chunk in chunks:
+        items = parser.feed(chunk)
+        if items:
+            yield items
+        if parser.done:
+            return
+    items = parser.close()
+    if items:
+        yield items
+
+
+def iter_array_items(chunks: Iterable[bytes], path: Sequence[str]) -> Iterator[Any]:
+    """Items of the array under `path`, decoded as `chunks` arrive."""
+    for items in iter_array_batches(chunks, path):
+        yield from items
+
+
+async def aiter_array_batches(
+    chunks: AsyncIterable[bytes], path: Sequence[str]
+) -> AsyncIterator[List[Any]]:
+    parser = JSONArrayParser(path)
+    async for chunk in chunks:
+        items = parser.feed(chunk)
+        if items:
+            yield items
+        if parser.done:
+            return
+    items = parser.close()
+    if items:
+        yield items
+
+
+async def aiter_array_items(
+    chunks: AsyncIterable[bytes], path: Sequence[str]
+) -> AsyncIterator[Any]:
+    async for items in aiter_array_batches(chunks, path):
+        for item in items:
+            yield item
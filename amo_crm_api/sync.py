@@ -0,0 +1,395 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from pydantic import BaseModel
+
+from .auth.storage.file import atomic_write
+from .base_api import BaseAmoCRMApi
+from .filters import DateRangeFilter, Filter
+
+if TYPE_CHECKING:
+    from .amo_crm import AmoCRMApi
+    from .async_amo_crm import AsyncAmoCRMApi
+
+LEADS = "leads"
+CONTACTS = "contacts"
+
+UPDATED_AT = "updated_at"
+
+
+class SyncCursor(BaseModel):
+    """
+    Position of an incremental sync: the newest `updated_at` seen and the ids
+    already yielded with exactly that timestamp.
+    """
+
+    updated_at: int = 0
+    ids: Set[int] = set()
+
+    def is_seen(self, item_id: int, updated_at: int) -> bool:
+        return updated_at < self.updated_at or (
+            updated_at == self.updated_at and item_id in self.ids
+        )
+
+    def advance(self, item_id: int, updated_at: int) -> None:
+        if updated_at > self.updated_at:
+            self.updated_at = updated_at
+            self.ids = {item_id}
+        else:
+            self.ids.add(item_id)
+
+
+class BaseCursorStorage(ABC):
+    @abstractmethod
+    def get_cursor(self, name: str) -> Optional[SyncCursor]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_cursor(self, name: str, cursor: SyncCursor) -> None:
+        raise NotImplementedError
+
+
+class MemoryCursorStorage(BaseCursorStorage):
+    def __init__(self) -> None:
+        self._cursors: Dict[str, str] = {}
+
+    def get_cursor(self, name: str) -> Optional[SyncCursor]:
+        data = self._cursors.get(name)
+        return SyncCursor.model_validate_json(data) if data else None
+
+    def save_cursor(self, name: str, cursor: SyncCursor) -> None:
+        self._cursors[name] = cursor.model_dump_json()
+
+
+class FileCursorStorage(BaseCursorStorage):
+    """One `sync/<name>.json` per cursor, replaced atomically on save."""
+
+    def __init__(self, directory_path=os.getcwd()):
+        self._dir_path = os.path.join(directory_path, "sync")
+
+        if not os.path.exists(self._dir_path):
+            os.makedirs(self._dir_path)
+
+    def _path(self, name: str) -> str:
+        if not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError(f"invalid cursor name: {name!r}")
+        return os.path.join(self._dir_path, f"{name}.json")
+
+    def get_cursor(self, name: str) -> Optional[SyncCursor]:
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as _file:
+                return SyncCursor.model_validate_json(_file.read())
+        except FileNotFoundError:
+            return None
+
+    def save_cursor(self, name: str, cursor: SyncCursor) -> None:
+        atomic_write(self._path(name), cursor.model_dump_json())
+
+
+def _from_timestamp(timestamp: Optional[int]) -> Optional[datetime]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class BaseIncrementalSync:
+    """
+    Yields entities created or changed since the previous run.
+
+    Pages are requested with `filter[updated_at][from]` set to the cursor and
+    `order[updated_at]=asc`. After every page the query restarts from the
+    newest timestamp seen, so entities updated while the sync runs are not
+    skipped the way they could be with plain page numbers; only when a whole
+    page shares the cursor timestamp the page number is increased instead, and
+    that timestamp is re-read once it is passed, to catch entities shifted to
+    pages already read. Entities already yielded at the cursor timestamp are
+    filtered out by id.
+
+    The cursor is saved once a page has been consumed, so delivery is
+    at-least-once: a consumer that stops mid-page gets that page again.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[BaseCursorStorage] = None,
+        limit: int = 250,
+        name_prefix: str = "",
+    ) -> None:
+        self._storage = storage if storage else FileCursorStorage()
+        self._limit = limit
+        self._name_prefix = name_prefix
+
+    def get_cursor(self, name: str) -> SyncCursor:
+        cursor = self._storage.get_cursor(self._name_prefix + name)
+        return cursor if cursor else SyncCursor()
+
+    def save_cursor(self, name: str, cursor: SyncCursor) -> None:
+        self._storage.save_cursor(self._name_prefix + name, cursor)
+
+    def reset(self, name: str, since: Optional[datetime] = None) -> None:
+        updated_at = int(since.timestamp()) if since else 0
+        self.save_cursor(name, SyncCursor(updated_at=updated_at))
+
+    def _start(self, name: str, since: Optional[datetime]) -> SyncCursor:
+        cursor = self._storage.get_cursor(self._name_prefix + name)
+        if cursor is None:
+            cursor = SyncCursor(updated_at=int(since.timestamp()) if since else 0)
+        return cursor
+
+    def _page_params(
+        self,
+        params: Optional[dict],
+        filters: List[Filter],
+        cursor: SyncCursor,
+        page: int,
+        to_updated_at: Optional[int] = None,
+    ) -> dict:
+        page_params = dict(params) if params else {}
+        page_params.update(BaseAmoCRMApi._filters_to_params(filters))
+        own_filter = f"filter[{UPDATED_AT}]"
+        if any(key.startswith(own_filter) for key in page_params):
+            raise ValueError(
+                f"the sync sets {own_filter} itself, use `since` or reset() instead"
+            )
+
+        cursor_filter = DateRangeFilter(UPDATED_AT)(
+            _from_timestamp(cursor.updated_at), _from_timestamp(to_updated_at)
+        )
+        page_params.update(BaseAmoCRMApi._filters_to_params([cursor_filter]))
+        page_params.update(
+            {"limit": self._limit, "page": page, f"order[{UPDATED_AT}]": "asc"}
+        )
+        return page_params
+
+    def _consume_page(
+        self, cursor: SyncCursor, page: int, items: List[Any]
+    ) -> Tuple[List[Any], int, bool, Optional[SyncCursor]]:
+        """
+        Advance the cursor over `items`.
+        Returns the unseen items, the next page number, whether it was the last
+        page and the timestamp group to re-check, if any.
+        """
+        group = SyncCursor(updated_at=cursor.updated_at, ids=set(cursor.ids))
+        fresh = []
+        for item in items:
+            updated_at = int(item.updated_at.timestamp())
+            if cursor.is_seen(item.id, updated_at):
+                continue
+            cursor.advance(item.id, updated_at)
+            if updated_at == group.updated_at:
+                group.ids.add(item.id)
+            fresh.append(item)
+
+        last_page = len(items) < self._limit
+        group_done = cursor.updated_at > group.updated_at or last_page
+        # a group spanning several pages was walked by page number; entities
+        # leaving it meanwhile shift the rest to pages already read
+        to_check = group if group_done and page > 1 else None
+        next_page = 1 if cursor.updated_at > group.updated_at else page + 1
+        return fresh, next_page, last_page, to_check
+
+    def _consume_group(self, group: SyncCursor, items: List[Any]) -> List[Any]:
+        fresh = []
+        for item in items:
+            updated_at = int(item.updated_at.timestamp())
+            if updated_at == group.updated_at and item.id not in group.ids:
+                group.ids.add(item.id)
+                fresh.append(item)
+        return fresh
+
+
+class IncrementalSync(BaseIncrementalSync):
+    def __init__(
+        self,
+        api: "AmoCRMApi",
+        storage: Optional[BaseCursorStorage] = None,
+        limit: int = 250,
+        name_prefix: str = "",
+    ) -> None:
+        self._api = api
+        super().__init__(storage, limit, name_prefix)
+
+    def leads(
+        self, filters: List[Filter] = [], since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        return self.sync(
+            name=LEADS,
+            object_type=self._api._lead_model,
+            path="/leads",
+            params={"with": "contacts,loss_reason"},
+            filters=filters,
+            since=since,
+        )
+
+    def contacts(
+        self, filters: List[Filter] = [], since: Optional[datetime] = None
+    ) -> Iterator[Any]:
+        return self.sync(
+            name=CONTACTS,
+            object_type=self._api._contact_model,
+            path="/contacts",
+            params={"with": "leads"},
+            filters=filters,
+            since=since,
+        )
+
+    def sync(
+        self,
+        name: str,
+        object_type: type,
+        path: str,
+        params: Optional[dict] = None,
+        filters: List[Filter] = [],
+        since: Optional[datetime] = None,
+    ) -> Iterator[Any]:
+        """`since` is only used when there is no stored cursor for `name` yet."""
+        cursor = self._start(name, since)
+        page = 1
+        while True:
+            page_params = self._page_params(params, filters, cursor, page)
+            items = self._api._get_objects_page(object_type, path, page_params)
+            if items is None:
+                break
+
+            fresh, page, last_page, group = self._consume_page(cursor, page, items)
+            yield from fresh
+            if group is not None:
+                yield from self._check_group(object_type, path, params, filters, group)
+            self.save_cursor(name, cursor)
+            if last_page:
+                break
+
+    def _check_group(
+        self,
+        object_type: type,
+        path: str,
+        params: Optional[dict],
+        filters: List[Filter],
+        group: SyncCursor,
+    ) -> Iterator[Any]:
+        """Re-read one timestamp until a pass finds nothing new."""
+        found = True
+        while found:
+            found = False
+            page = 1
+            while True:
+                page_params = self._page_params(
+                    params, filters, group, page, group.updated_at
+                )
+                items = self._api._get_objects_page(object_type, path, page_params)
+                if items is None:
+                    break
+                for item in self._consume_group(group, items):
+                    found = True
+                    yield item
+                if len(items) < self._limit:
+                    break
+                page += 1
+
+
+class AsyncIncrementalSync(BaseIncrementalSync):
+    def __init__(
+        self,
+        api: "AsyncAmoCRMApi",
+        storage: Optional[BaseCursorStorage] = None,
+        limit: int = 250,
+        name_prefix: str = "",
+    ) -> None:
+        self._api = api
+        super().__init__(storage, limit, name_prefix)
+
+    def leads(
+        self, filters: List[Filter] = [], since: Optional[datetime] = None
+    ) -> AsyncIterator[Any]:
+        return self.sync(
+            name=LEADS,
+            object_type=self._api._lead_model,
+            path="/leads",
+            params={"with": "contacts,loss_reason"},
+            filters=filters,
+            since=since,
+        )
+
+    def contacts(
+        self, filters: List[Filter] = [], since: Optional[datetime] = None
+    ) -> AsyncIterator[Any]:
+        return self.sync(
+            name=CONTACTS,
+            object_type=self._api._contact_model,
+            path="/contacts",
+            params={"with": "leads"},
+            filters=filters,
+            since=since,
+        )
+
+    async def sync(
+        self,
+        name: str,
+        object_type: type,
+        path: str,
+        params: Optional[dict] = None,
+        filters: List[Filter] = [],
+        since: Optional[datetime] = None,
+    ) -> AsyncIterator[Any]:
+        """`since` is only used when there is no stored cursor for `name` yet."""
+        cursor = self._start(name, since)
+        page = 1
+        while True:
+            page_params = self._page_params(params, filters, cursor, page)
+            items = await self._api._get_objects_page(object_type, path, page_params)
+            if items is None:
+                break
+
+            fresh, page, last_page, group = self._consume_page(cursor, page, items)
+            for item in fresh:
+                yield item
+            if group is not None:
+                async for item in self._check_group(
+                    object_type, path, params, filters, group
+                ):
+                    yield item
+            self.save_cursor(name, cursor)
+            if last_page:
+                break
+
+    async def _check_group(
+        self,
+        object_type: type,
+        path: str,
+        params: Optional[dict],
+        filters: List[Filter],
+        group: SyncCursor,
+    ) -> AsyncIterator[Any]:
+        """Re-read one timestamp until a pass finds nothing new."""
+        found = True
+        while found:
+            found = False
+            page = 1
+            while True:
+                page_params = self._page_params(
+                    params, filters, group, page, group.updated_at
+                )
+                items = await self._api._get_objects_page(
+                    object_type, path, page_params
+                )
+                if items is None:
+                    break
+                for item in self._consume_group(group, items):
+                    found = True
+                    yield item
+                if len(items) < self._limit:
+                    break
+                page += 1
@@ -16,10 +16,11 @@ setup(
     url="https://github.com/damir-2000/amo_crm_api",
     packages=find_packages(),
     install_requires=requirements,
+    extras_require={"async": ["httpx>=0.26.0"], "redis": ["redis>=4.2.0"]},
     license="MIT",
     python_requires=">=3.9.13",
     # classifiers=[
     #     "Programming Language :: Python :: 3.7",
     #     "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
     # ],
-)
\ No newline at end of file
+)
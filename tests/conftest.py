@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def lead_data():
+    return {
+        "id": 7,
+        "name": "x",
+        "price": 5,
+        "updated_at": 1700000000,
+        "created_at": 1700000000,
+    }
@@ -0,0 +1,60 @@
+import json
+from typing import Any, Callable, List, Optional
+
+from amo_crm_api import AmoCRMApi, AmoCRMTokenAuth
+from amo_crm_api.schemas import ContactSchema, LeadSchema
+
+
+class FakeResponse:
+    def __init__(
+        self, status_code: int, payload: Any = None, headers: Optional[dict] = None
+    ) -> None:
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode() if payload is not None else b""
+        self.headers = headers or {}
+        self.closed = False
+
+    @property
+    def _content(self) -> bytes:
+        return self.content
+
+    @_content.setter
+    def _content(self, value: bytes) -> None:
+        self.content = value
+
+    def close(self) -> None:
+        self.closed = True
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class AsyncFakeResponse(FakeResponse):
+    async def aread(self) -> bytes:
+        return self.content
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class RecordingApi:
+    """Sync client whose requests are answered by `handler`."""
+
+    def __init__(self, handler: Callable[..., FakeResponse]) -> None:
+        self.calls: List[dict] = []
+        self.api = AmoCRMApi[LeadSchema, ContactSchema](
+            AmoCRMTokenAuth("example", "token")
+        )
+
+        def request(method: str, path: str, json: Optional[Any] = None, **kwargs):
+            self.calls.append(
+                {
+                    "method": method,
+                    "path": path,
+                    "json": json,
+                    "params": kwargs.get("params"),
+                }
+            )
+            return handler(method, path, json)
+
+        self.api.request = request  # type: ignore
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from time import time
+from typing import Optional
+
+import jwt
+
+from amo_crm_api import AsyncAmoCRMAuth
+from amo_crm_api.auth.storage import BaseTokenStorage
+
+
+class SlowLock:
+    def __init__(self) -> None:
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+        self.exited = threading.Event()
+
+    def __enter__(self) -> "SlowLock":
+        self.entered.set()
+        self.proceed.wait(5)
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.exited.set()
+
+
+class SlowLockStorage(BaseTokenStorage):
+    def __init__(self) -> None:
+        self.slow_lock = SlowLock()
+        self.threads = set()
+        exp = int(time() - 10)
+        self.access_token = jwt.encode({"exp": exp}, "secret", algorithm="HS256")
+
+    def get_access_token(self) -> Optional[str]:
+        self.threads.add(threading.get_ident())
+        return self.access_token
+
+    def get_refresh_token(self) -> Optional[str]:
+        return "refresh"
+
+    def save_tokens(self, access_token: str, refresh_token: str):
+        self.access_token = access_token
+
+    def lock(self) -> SlowLock:
+        return self.slow_lock
+
+
+def make_auth(storage: SlowLockStorage) -> AsyncAmoCRMAuth:
+    return AsyncAmoCRMAuth(
+        subdomain="example",
+        client_id="id",
+        client_secret="secret",
+        redirect_url="https://example.com",
+        storage=storage,
+    )
+
+
+def test_cancelled_lock_wait_releases_the_lock():
+    storage = SlowLockStorage()
+    auth = make_auth(storage)
+
+    async def main():
+        task = asyncio.ensure_future(auth._get_access_token())
+        await asyncio.get_running_loop().run_in_executor(
+            None, storage.slow_lock.entered.wait, 5
+        )
+        task.cancel()
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        # the worker thread gets the lock only now
+        storage.slow_lock.proceed.set()
+        await asyncio.get_running_loop().run_in_executor(
+            None, storage.slow_lock.exited.wait, 5
+        )
+
+    asyncio.run(main())
+    assert storage.slow_lock.exited.is_set()
+
+
+def test_storage_is_read_off_the_loop_thread():
+    storage = SlowLockStorage()
+    storage.slow_lock.proceed.set()
+    storage.access_token = jwt.encode(
+        {"exp": int(time() + 3600)}, "secret", algorithm="HS256"
+    )
+
+    assert asyncio.run(make_auth(storage)._get_access_token()) == storage.access_token
+    assert threading.get_ident() not in storage.threads
@@ -0,0 +1,67 @@
+from amo_crm_api import UpdateBuffer
+from amo_crm_api.schemas import LeadSchema
+from amo_crm_api.schemas.base_model import API_CONTEXT
+
+from .helpers import FakeResponse, RecordingApi
+
+
+def batch_handler(method, path, json):
+    return FakeResponse(
+        200,
+        {
+            "_embedded": {
+                "leads": [
+                    {
+                        "id": item["id"],
+                        "updated_at": 1700000001,
+                        "request_id": item["request_id"],
+                    }
+                    for item in json
+                ]
+            }
+        },
+    )
+
+
+def sent(fake):
+    return [
+        {key: value for key, value in item.items() if key != "request_id"}
+        for call in fake.calls
+        for item in call["json"]
+    ]
+
+
+def test_flush_marks_sent_changes_as_saved(lead_data):
+    fake = RecordingApi(batch_handler)
+    lead = LeadSchema.model_validate(lead_data, context=API_CONTEXT)
+
+    with UpdateBuffer(fake.api, max_delay=60) as buffer:
+        lead.name = "y"
+        first = buffer.update_lead(lead)
+        buffer.flush()
+        assert first.result().ok
+        assert not lead.model_has_changes()
+
+        lead.price = 6
+        buffer.update_lead(lead)
+        buffer.flush()
+
+    assert sent(fake) == [{"id": 7, "name": "y"}, {"id": 7, "price": 6}]
+    assert lead.updated_at.timestamp() == 1700000001
+
+
+def test_changes_after_queuing_stay_unsaved(lead_data):
+    fake = RecordingApi(batch_handler)
+    lead = LeadSchema.model_validate(lead_data, context=API_CONTEXT)
+
+    with UpdateBuffer(fake.api, max_delay=60) as buffer:
+        lead.name = "y"
+        buffer.update_lead(lead)
+        # not queued, so not sent by the flush
+        lead.price = 6
+        buffer.flush()
+
+        assert lead.model_changed_fields() == {"price"}
+        buffer.update_lead(lead)
+
+    assert sent(fake) == [{"id": 7, "name": "y"}, {"id": 7, "price": 6}]
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+from typing import Annotated, Optional
+
+from pydantic import Field
+
+from amo_crm_api.schemas import LeadSchema
+from amo_crm_api.schemas.base_model import API_CONTEXT, TextField
+
+from .helpers import FakeResponse, RecordingApi
+
+
+class TextLeadSchema(LeadSchema):
+    text: Annotated[Optional[str], TextField(field_id=100), Field(exclude=True)] = None
+
+
+def test_update_refreshes_updated_at(lead_data):
+    fake = RecordingApi(
+        lambda method, path, json: FakeResponse(
+            200, {"id": 7, "updated_at": 1700000001}
+        )
+    )
+    lead = LeadSchema.model_validate(lead_data, context=API_CONTEXT)
+    lead.name = "y"
+
+    assert fake.api.update_lead(lead).updated_at == lead.updated_at
+    assert lead.updated_at == datetime.fromtimestamp(1700000001, timezone.utc)
+
+    # nothing changed since, no request and the saved timestamp
+    assert fake.api.update_lead(lead).updated_at == lead.updated_at
+    assert len(fake.calls) == 1
+
+
+def test_dump_changes_leaves_fields_set_alone():
+    lead = TextLeadSchema.model_validate({"id": 1, "name": "a"}, context=API_CONTEXT)
+    lead.text = "b"
+    fields_set = set(lead.model_fields_set)
+
+    assert lead.model_dump_changes(by_alias=True) == {
+        "id": 1,
+        "custom_fields_values": [
+            {"field_id": 100, "field_code": None, "values": [{"value": "b"}]}
+        ],
+    }
+    assert lead.model_fields_set == fields_set
+
+
+def raw_lead():
+    return LeadSchema.model_validate(
+        {
+            "id": 1,
+            "custom_fields_values": [
+                {"field_id": 200, "values": [{"value": "old"}]},
+                {"field_code": "SOURCE", "values": [{"value": "web"}]},
+            ],
+        },
+        context=API_CONTEXT,
+    )
+
+
+def test_raw_custom_field_edited_in_place():
+    lead = raw_lead()
+    assert not lead.model_has_changes()
+
+    lead.custom_fields_values[0].values[0].value = "new"  # type: ignore
+
+    assert lead.model_has_changes()
+    assert lead.model_dump_changes(by_alias=True) == {
+        "id": 1,
+        "custom_fields_values": [{"field_id": 200, "values": [{"value": "new"}]}],
+    }
+
+
+def test_raw_custom_fields_cleared():
+    lead = raw_lead()
+    lead.custom_fields_values = []
+
+    assert lead.model_changed_fields() == {"custom_fields_values"}
+    assert lead.model_dump_changes(by_alias=True) == {
+        "id": 1,
+        "custom_fields_values": [
+            {"field_id": 200, "field_code": None, "values": None},
+            {"field_id": None, "field_code": "SOURCE", "values": None},
+        ],
+    }
+
+
+def test_raw_custom_field_edit_is_sent():
+    fake = RecordingApi(
+        lambda method, path, json: FakeResponse(
+            200, {"id": 1, "updated_at": 1700000001}
+        )
+    )
+    lead = raw_lead()
+    lead.custom_fields_values.pop()  # type: ignore
+
+    fake.api.update_lead(lead)
+
+    assert fake.calls[0]["json"]["custom_fields_values"] == [
+        {"field_id": None, "field_code": "SOURCE", "values": None}
+    ]
+    assert not lead.model_has_changes()
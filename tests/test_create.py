@@ -0,0 +1,78 @@
+import asyncio
+
+from amo_crm_api import AsyncAmoCRMApi
+from amo_crm_api.auth import AsyncAmoCRMTokenAuth
+from amo_crm_api.schemas import ComplexLeadSchema, ContactSchema, LeadSchema
+
+from .helpers import FakeResponse, RecordingApi
+
+
+def test_async_create_returns_the_created_models():
+    api = AsyncAmoCRMApi[LeadSchema, ContactSchema](
+        AsyncAmoCRMTokenAuth("example", "token")
+    )
+
+    async def request(method, path, json=None, **kwargs):
+        entity = path.strip("/")
+        return FakeResponse(
+            200, {"_embedded": {entity: [{"id": 42, "request_id": "0"}]}}
+        )
+
+    api.request = request  # type: ignore
+
+    async def main():
+        return (
+            await api.create_lead(LeadSchema(name="lead")),
+            await api.create_contact(ContactSchema(name="contact")),
+        )
+
+    lead, contact = asyncio.run(main())
+    assert isinstance(lead, LeadSchema) and lead.id == 42
+    assert isinstance(contact, ContactSchema) and contact.id == 42
+    # everything set was sent with the create
+    assert not lead.model_has_changes()
+
+
+def test_create_complex_leads_matches_request_ids():
+    fake = RecordingApi(
+        lambda method, path, json: FakeResponse(
+            200,
+            [
+                {
+                    "id": 100 + int(item.get("request_id", "0")),
+                    "contact_id": 200,
+                    "company_id": None,
+                    "request_id": [item.get("request_id", "0")],
+                    "merged": False,
+                }
+                for item in reversed(json)
+            ],
+        )
+    )
+    items = [ComplexLeadSchema(lead=LeadSchema(name=str(i))) for i in range(3)]
+
+    results = fake.api.create_complex_leads(items)
+
+    assert [result.id for result in results] == [100, 101, 102]
+    assert results[1].response.request_id == ["1"]
+    assert (
+        fake.api.create_complex_lead(
+            LeadSchema(name="x"), ContactSchema(name="y")
+        ).contact_id
+        == 200
+    )
+
+
+def test_sync_create_returns_the_created_models():
+    fake = RecordingApi(
+        lambda method, path, json: FakeResponse(
+            200, {"_embedded": {path.strip("/"): [{"id": 42, "request_id": "0"}]}}
+        )
+    )
+
+    lead = fake.api.create_lead(LeadSchema(name="lead"))
+    contact = fake.api.create_contact(ContactSchema(name="contact"))
+
+    assert isinstance(lead, LeadSchema) and lead.id == 42
+    assert isinstance(contact, ContactSchema) and contact.id == 42
+    assert not lead.model_has_changes()
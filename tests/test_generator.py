@@ -0,0 +1,49 @@
+import pytest
+
+from amo_crm_api.schemas.custom_fields import CustomFieldSchema
+from amo_crm_api.schemas.generator import build_fields, create_schema
+
+
+def definition(field_id: int, name: str, code=None) -> CustomFieldSchema:
+    return CustomFieldSchema(
+        id=field_id,
+        name=name,
+        type="text",
+        account_id=1,
+        code=code,
+        sort=field_id,
+        is_api_only=False,
+        group_id=None,
+        required_statuses=[],
+        is_deletable=True,
+        is_predefined=False,
+        entity_type="leads",
+        tracking_callback=None,
+        remind=None,
+        triggers=[],
+        currency=None,
+        hidden_statuses=[],
+        chained_lists=None,
+    )
+
+
+@pytest.mark.parametrize("name", ["name", "id", "model_dump", "model_x", "_x", "json"])
+def test_override_must_not_shadow(name):
+    with pytest.raises(ValueError):
+        build_fields([definition(10, "Source")], names={10: name})
+
+
+def test_override_must_be_an_identifier():
+    with pytest.raises(ValueError):
+        build_fields([definition(10, "Source")], names={10: "not valid"})
+
+
+def test_generated_names_avoid_overrides_and_base_attributes():
+    fields = build_fields(
+        [definition(10, "Source"), definition(11, "Copy"), definition(12, "Model X")],
+        names={12: "source"},
+    )
+
+    assert [field.name for field in fields] == ["source_10", "copy_11", "source"]
+    schema = create_schema([definition(10, "Source")], names={10: "origin"})
+    assert "origin" in schema.model_fields
@@ -0,0 +1,87 @@
+import asyncio
+from time import time
+
+import fakeredis
+import jwt
+import pytest
+
+from amo_crm_api import AmoCRMAuth, AsyncAmoCRMAuth
+from amo_crm_api.auth.storage.redis import RedisTokenStorage
+
+
+def make_token(exp: float) -> str:
+    return jwt.encode({"exp": int(exp)}, "secret", algorithm="HS256")
+
+
+@pytest.fixture
+def storage():
+    client = fakeredis.FakeRedis()
+    storage = RedisTokenStorage(client, subscribe=False)
+    # expired access token, so the first request refreshes it
+    storage.save_tokens(make_token(time() - 10), "refresh-1")
+    return storage
+
+
+def auth_kwargs(storage):
+    return dict(
+        subdomain="example",
+        client_id="id",
+        client_secret="secret",
+        redirect_url="https://example.com",
+        storage=storage,
+    )
+
+
+def test_sync_refresh(storage):
+    auth = AmoCRMAuth(**auth_kwargs(storage))
+    new_token = make_token(time() + 3600)
+    requests = []
+
+    def get_or_update_tokens(refresh_token=None, code=None, skip_error=False):
+        requests.append(refresh_token)
+        return {"access_token": new_token, "refresh_token": "refresh-2"}
+
+    auth._get_or_update_tokens = get_or_update_tokens
+
+    assert auth._get_access_token() == new_token
+    assert requests == ["refresh-1"]
+    assert storage.get_refresh_token() == "refresh-2"
+    assert not storage._client.exists(storage.lock_key)
+
+
+def test_async_refresh(storage):
+    auth = AsyncAmoCRMAuth(**auth_kwargs(storage))
+    new_token = make_token(time() + 3600)
+    requests = []
+
+    async def get_or_update_tokens(refresh_token=None, code=None, skip_error=False):
+        requests.append(refresh_token)
+        return {"access_token": new_token, "refresh_token": "refresh-2"}
+
+    auth._get_or_update_tokens = get_or_update_tokens
+
+    # the lock is acquired and released in different worker threads
+    assert asyncio.run(auth._get_access_token()) == new_token
+    assert requests == ["refresh-1"]
+    assert storage.get_refresh_token() == "refresh-2"
+    assert not storage._client.exists(storage.lock_key)
+
+
+def test_concurrent_async_refresh_once(storage):
+    auth = AsyncAmoCRMAuth(**auth_kwargs(storage))
+    new_token = make_token(time() + 3600)
+    requests = []
+
+    async def get_or_update_tokens(refresh_token=None, code=None, skip_error=False):
+        requests.append(refresh_token)
+        await asyncio.sleep(0.01)
+        return {"access_token": new_token, "refresh_token": "refresh-2"}
+
+    auth._get_or_update_tokens = get_or_update_tokens
+
+    async def main():
+        return await asyncio.gather(*(auth._get_access_token() for _ in range(5)))
+
+    assert asyncio.run(main()) == [new_token] * 5
+    assert requests == ["refresh-1"]
+    assert not storage._client.exists(storage.lock_key)
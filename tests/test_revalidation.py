@@ -0,0 +1,72 @@
+import asyncio
+
+from amo_crm_api import AmoCRMTokenAuth, AsyncAmoCRMTokenAuth, Revalidator
+
+from .helpers import AsyncFakeResponse, FakeResponse
+
+USERS = {"_embedded": {"users": [{"id": 1}]}}
+
+
+def test_not_modified_after_eviction_is_repeated():
+    revalidator = Revalidator(paths=["/users"])
+    auth = AmoCRMTokenAuth("example", "token", revalidator=revalidator)
+    sent_headers = []
+
+    def send(method, request_url, params, data, json, headers, stream=False):
+        sent_headers.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            # the entry is evicted while the request is in flight
+            revalidator.clear()
+            return FakeResponse(304)
+        return FakeResponse(200, USERS, {"ETag": '"v1"'})
+
+    auth._send = send  # type: ignore
+
+    assert auth.request("GET", "/users").status_code == 200
+    response = auth.request("GET", "/users")
+
+    assert response.status_code == 200
+    assert response.json() == USERS
+    assert sent_headers == [{}, {"If-None-Match": '"v1"'}, {}]
+    assert revalidator.stats()["evicted"] == 1
+
+
+def test_not_modified_is_answered_from_the_stored_body():
+    revalidator = Revalidator(paths=["/users"])
+    auth = AmoCRMTokenAuth("example", "token", revalidator=revalidator)
+
+    def send(method, request_url, params, data, json, headers, stream=False):
+        if headers:
+            return FakeResponse(304)
+        return FakeResponse(200, USERS, {"ETag": '"v1"'})
+
+    auth._send = send  # type: ignore
+
+    auth.request("GET", "/users")
+    response = auth.request("GET", "/users")
+
+    assert response.json() == USERS
+    assert revalidator.stats()["not_modified"] == 1
+
+
+def test_async_not_modified_after_eviction_is_repeated():
+    revalidator = Revalidator(paths=["/users"])
+    auth = AsyncAmoCRMTokenAuth("example", "token", revalidator=revalidator)
+    sent_headers = []
+
+    async def send(method, request_url, params, data, json, headers, stream=False):
+        sent_headers.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            revalidator.clear()
+            return AsyncFakeResponse(304)
+        return AsyncFakeResponse(200, USERS, {"ETag": '"v1"'})
+
+    auth._send = send  # type: ignore
+
+    async def main():
+        await auth.request("GET", "/users")
+        return await auth.request("GET", "/users")
+
+    response = asyncio.run(main())
+    assert response.json() == USERS
+    assert sent_headers == [{}, {"If-None-Match": '"v1"'}, {}]
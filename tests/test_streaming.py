@@ -0,0 +1,37 @@
+import json
+
+from amo_crm_api.streaming import iter_array_items
+
+PAGE = {
+    "_page": 1,
+    "_score": -12.5e-3,
+    "_links": {"self": {"href": "https://example.amocrm.ru/api/v4/leads"}},
+    "_embedded": {
+        "leads": [
+            {"id": 1, "price": 1.5, "score": -2e10, "ratio": 3e-2, "ok": True},
+            {"id": 22, "name": 'Сделка é "x"', "tags": [], "extra": None},
+            {"id": 333, "values": [0, -0.25, 1e5, 10], "closed_at": 1700000000},
+        ]
+    },
+}
+BODY = json.dumps(PAGE, ensure_ascii=False).replace("3e-2", "3E-2").encode()
+EXPECTED = json.loads(BODY)["_embedded"]["leads"]
+NUMBERS = b'{"_total": 3.25, "ids": [1.5, -2e10, 3E-2, 0, -7, 10.0e+2]}'
+
+
+def test_chunk_split_at_every_offset():
+    for offset in range(len(BODY) + 1):
+        chunks = [BODY[:offset], BODY[offset:]]
+        assert list(iter_array_items(chunks, ("_embedded", "leads"))) == EXPECTED
+
+
+def test_byte_by_byte():
+    chunks = [BODY[i : i + 1] for i in range(len(BODY))]
+    assert list(iter_array_items(chunks, ("_embedded", "leads"))) == EXPECTED
+
+
+def test_numbers_split_at_every_offset():
+    expected = json.loads(NUMBERS)["ids"]
+    for offset in range(len(NUMBERS) + 1):
+        chunks = [NUMBERS[:offset], NUMBERS[offset:]]
+        assert list(iter_array_items(chunks, ("ids",))) == expected
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from amo_crm_api import IncrementalSync, MemoryCursorStorage
+from amo_crm_api.filters import DateRangeFilter, SingleFilter
+
+from .helpers import FakeResponse, RecordingApi
+
+
+def leads_page(method, path, json):
+    return FakeResponse(
+        200,
+        {
+            "_embedded": {
+                "leads": [
+                    {"id": 1, "updated_at": 1700000000},
+                    {"id": 2, "updated_at": 1700000005},
+                ]
+            }
+        },
+    )
+
+
+def test_sync_filters_by_the_cursor():
+    fake = RecordingApi(leads_page)
+    sync = IncrementalSync(fake.api, MemoryCursorStorage())
+
+    leads = list(sync.leads(filters=[SingleFilter("pipeline_id")(3)]))
+
+    assert [lead.id for lead in leads] == [1, 2]
+    assert fake.calls[0]["params"] == {
+        "with": "contacts,loss_reason",
+        "filter[pipeline_id]": 3,
+        "filter[updated_at][from]": 0,
+        "limit": 250,
+        "page": 1,
+        "order[updated_at]": "asc",
+    }
+    assert sync.get_cursor("leads").updated_at == 1700000005
+
+
+def test_sync_rejects_an_updated_at_filter():
+    fake = RecordingApi(leads_page)
+    sync = IncrementalSync(fake.api, MemoryCursorStorage())
+    since = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    with pytest.raises(ValueError, match="updated_at"):
+        next(sync.leads(filters=[DateRangeFilter("updated_at")(since, since)]))
+    assert fake.calls == []